@@ -17,14 +17,20 @@
 
 """Marshmallow Schemas for DispatcherService."""
 
-__version__ = '0.1.11'
+__version__ = '0.1.23'
 
 from datetime import datetime
-from marshmallow import Schema, fields, pre_dump, pre_load, EXCLUDE, INCLUDE
+from marshmallow import Schema, fields, pre_load, EXCLUDE
 from summary_status import SummaryStatus
 from supported_models import SupportedModel
 from supported_languages import SupportedLanguage
-from warning_messages import WarningMessage
+from warning_messages import UNSUPPORTED_MODEL, UNSUPPORTED_LANGUAGE
+
+# Enum values are immutable, so they are computed only once
+_SUPP_MODELS = frozenset(model.value for model in SupportedModel)
+_SUPP_LANGUAGES = frozenset(language.value for language in SupportedLanguage)
+_DEFAULT_MODEL = SupportedModel.T5_LARGE.value
+_DEFAULT_LANGUAGE = SupportedLanguage.ENGLISH.value
 
 
 class Summary():
@@ -51,6 +57,9 @@ class Summary():
       the language of the summary.
     """
 
+    __slots__ = ('id_', 'source', 'output', 'model', 'params', 'status',
+                 'started_at', 'ended_at', 'language')
+
     def __init__(self,
                  id_: str,
                  source: str,
@@ -73,8 +82,11 @@ class Summary():
         self.language = language.value
 
     def __str__(self):
-        return (f'SUMMARY [id]: {self.id_}, [source]: "{self.source}", '
-                f'[output]: "{self.output}", [model]: {self.model}, '
+        # The source and output can be long texts, so only their beginning is
+        # included, as in the debug logs
+        output = self.output[:50] if self.output is not None else None
+        return (f'SUMMARY [id]: {self.id_}, [source]: "{self.source[:50]}", '
+                f'[output]: "{output}", [model]: {self.model}, '
                 f'[params]: {self.params}, [status]: {self.status}, '
                 f'[started_at]: {self.started_at}, [ended_at]: {self.ended_at}, '
                 f'[language]: {self.language}')
@@ -102,6 +114,10 @@ class PlainTextRequestSchema(Schema):
         cache (:obj:`bool`):
             Whether the summary must be cached or not. A cached summary implies that
             it will be permanently stored in the database.
+        stream_status (:obj:`bool`, `optional`, defaults to :obj:`False`):
+            Whether the status of the summary must be updated at every stage of
+            its generation, instead of only with the warnings and once completed.
+            It is not a param, since it does not affect the summary.
         warnings (:obj:`dict`):
             The warnings derived from the client's request (if any).
     """
@@ -112,42 +128,47 @@ class PlainTextRequestSchema(Schema):
     params = fields.Dict(required=True)
     language = fields.Str(required=True)
     cache = fields.Bool(required=True)
+    stream_status = fields.Bool(required=True)
     warnings = fields.Dict(keys=fields.Str(), values=fields.List(fields.Str()))
 
     @pre_load
     def validate_and_set_defaults(self, data, many, **kwargs):
         """Validate fields and substitute :obj:`None` or missing fields by default values."""
 
-        supp_models = [model.value for model in SupportedModel]
-        supp_languages = [language.value for language in SupportedLanguage]
         warning_msgs = {}
 
         # Prevent the client from including 'warnings' in the request
-        if "warnings" in data:
-            del data["warnings"]
+        data.pop("warnings", None)
 
-        # Check model
-        if "model" not in data or "model" in data and data["model"] is None:
-            data["model"] = SupportedModel.T5_LARGE.value
-        elif "model" in data and data["model"] not in supp_models:
-            warning_msgs["model"] = [WarningMessage.UNSUPPORTED_MODEL.value]
-            data["model"] = SupportedModel.T5_LARGE.value
+        # Check model (non-str values are checked first, since they might
+        # not be hashable)
+        model = data.get("model")
+        if model is None:
+            data["model"] = _DEFAULT_MODEL
+        elif not isinstance(model, str) or model not in _SUPP_MODELS:
+            warning_msgs["model"] = [UNSUPPORTED_MODEL]
+            data["model"] = _DEFAULT_MODEL
 
         # Check params
-        if "params" not in data or "params" in data and data["params"] is None:
+        if data.get("params") is None:
             data["params"] = {}
 
         # Check languages
-        if "language" not in data or "language" in data and data["language"] is None:
-            data["language"] = SupportedLanguage.ENGLISH.value
-        elif "language" in data and data["language"] not in supp_languages:
-            warning_msgs["language"] = [WarningMessage.UNSUPPORTED_LANGUAGE.value]
-            data["language"] = SupportedLanguage.ENGLISH.value
+        language = data.get("language")
+        if language is None:
+            data["language"] = _DEFAULT_LANGUAGE
+        elif not isinstance(language, str) or language not in _SUPP_LANGUAGES:
+            warning_msgs["language"] = [UNSUPPORTED_LANGUAGE]
+            data["language"] = _DEFAULT_LANGUAGE
 
         # Check cache
-        if ("cache" not in data or "cache" in data and data["cache"] is None):
+        if data.get("cache") is None:
             data["cache"] = True
 
+        # Check stream status
+        if data.get("stream_status") is None:
+            data["stream_status"] = False
+
         # Add warnings (if any)
         if warning_msgs:
             data["warnings"] = warning_msgs
@@ -166,7 +187,13 @@ class ResponseSchema(Schema):
     ready, the ``status`` will change to ``completed``
     and the missing fields will be available then.
 
+    The object to dump is the :class:`Summary` itself. The warnings are not
+    an attribute of the summary, so they are added to the dumped dict
+    afterwards, only if there are any.
+
     Fields:
+        summary_id (:obj:`str`):
+            The id of the summary.
         started_at (:obj:`datetime.datetime`):
             The time when the summary was first created.
         ended_at (:obj:`datetime.datetime`):
@@ -181,11 +208,11 @@ class ResponseSchema(Schema):
             The parameters with which the summary was generated.
         language (:obj:`str`):
             The language of the summary.
-        warnings (:obj:`dict`):
-            The warnings derived from the client's request (if any).
     """
 
-    summary_id = fields.Str(required=True)
+    # The fields are read directly from the Summary object, so no
+    # intermediate dict has to be built on every dump
+    summary_id = fields.Str(required=True, attribute="id_")
     started_at = fields.DateTime(required=True)
     ended_at = fields.DateTime(required=True)
     status = fields.Str(required=True)
@@ -193,84 +220,43 @@ class ResponseSchema(Schema):
     model = fields.Str(required=True)
     params = fields.Dict(required=True)
     language = fields.Str(required=True)
-    warnings = fields.Dict(keys=fields.Str(), values=fields.List(fields.Str()))
-
-    @pre_dump
-    def build_reponse(self, data: dict, **kwargs):
-        """Build a response with the :obj:`Summary` and warnings (if any).
-
-        The data must have the following scheme: ``{"summary": summary_object,
-        "warnings": warnings}``.
-
-        This method is executed when calling :meth:`Schema.dump`. Since a
-        summary includes more information than it will be included in the
-        response, e.g., its id, with this function we get only the necessary
-        fields to form a response.
-
-        For more information, see the
-        `Marshmallow documentationn
-        <https://marshmallow.readthedocs.io/en/stable/api_reference.html#marshmallow.pre_dump>`__.
-        """
-
-        summary = data["summary"]
-        warnings = data["warnings"]
-        response = {"summary_id": summary.id_,
-                    "started_at": summary.started_at,
-                    "ended_at": summary.ended_at,
-                    "status": summary.status,
-                    "output": summary.output,
-                    "model": summary.model,
-                    "params": summary.params,
-                    "language": summary.language}
-
-        if warnings is not None:
-            response["warnings"] = warnings
-
-        return response
 
     class Meta:
         ordered = True
         unknown = EXCLUDE
 
 
-class TextEncodingProducedMsgSchema(Schema):
-    """Schema for the produced messages to the topic :attr:`KafkaTopic.TEXT_ENCODING`.
+def dump_response(summary: Summary, warnings: dict = None) -> dict:
+    """Dump a summary into the response to the clients' requests.
 
-    Fields:
-        text_preprocessed (:obj:`str`):
-            The pre-processed text.
-        model (:obj:`str`):
-            The model used to generate the summary.
-        params (:obj:`dict`):
-            The params used in the summary generation.
-    """
-
-    text_preprocessed = fields.Str(required=True)
-    model = fields.Str(required=True)
-    params = fields.Dict(required=True)
-
-
-class ConsumedMsgSchema(Schema):
-    """Schema for the consumed messages.
+    This produces the same dict as :code:`ResponseSchema().dump(summary)`,
+    plus the warnings, if there are any. The response always has the same
+    fields, so the dict is built directly instead of going through the
+    per-field serialization of Marshmallow. :class:`ResponseSchema` remains
+    the reference for the fields of the response.
 
-    Fields:
-        summary_status (:obj:`str`):
-            The status of the summary.
-        params (:obj:`dict`):
-            The valid params, onced checked by the summarizer.
-        text_preprocessed (:obj:`str`):
-            The preprocessed text.
-        output (:obj:`str`):
-            The summary.
-        warnings (:obj:`dict`):
+    Args:
+        summary (:obj:`Summary`):
+            The summary to dump.
+        warnings (:obj:`dict`, `optional`, defaults to :obj:`None`):
             The warnings derived from the client's request (if any).
-    """
 
-    summary_status = fields.Str(required=True)
-    params = fields.Dict()
-    text_preprocessed = fields.Str()
-    output = fields.Str()
-    warnings = fields.Dict(keys=fields.Str(), values=fields.List(fields.Str()))
+    Returns:
+        :obj:`dict`: The response.
+    """
 
-    class Meta:
-        unknown = INCLUDE
+    started_at = summary.started_at
+    ended_at = summary.ended_at
+    response = {
+        "summary_id": summary.id_,
+        "started_at": started_at.isoformat() if started_at is not None else None,
+        "ended_at": ended_at.isoformat() if ended_at is not None else None,
+        "status": summary.status,
+        "output": summary.output,
+        "model": summary.model,
+        "params": summary.params,
+        "language": summary.language
+    }
+    if warnings is not None:
+        response["warnings"] = warnings
+    return response
@@ -17,20 +17,22 @@
 
 """Summary Data Access Object (DAO) Interface."""
 
-__version__ = '0.1.3'
+__version__ = '0.1.7'
 
+from abc import ABC, abstractmethod
 from datetime import datetime
+from typing import Optional, Tuple
 from schemas import Summary
 from summary_status import SummaryStatus
 from supported_models import SupportedModel
 from supported_languages import SupportedLanguage
-from warning_messages import WarningMessage
 
 
-class SummaryDAOInterface:
+class SummaryDAOInterface(ABC):
     """DAO Interface for access to :obj:`Summary` objects."""
 
-    def get_summary(self, id_: str):
+    @abstractmethod
+    def get_summary(self, id_: str) -> Tuple[Optional[Summary], Optional[dict]]:
         """Retrieve a summary from the database.
 
         Args:
@@ -44,6 +46,26 @@ class SummaryDAOInterface:
             is not any summary with the specified id.
         """
 
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_summaries(self, ids: list) -> dict:
+        """Retrieve several summaries from the database at once.
+
+        Args:
+            ids (:obj:`list`):
+                The summary ids.
+
+        Returns:
+            :obj:`dict`: A dictionary whose keys are the ids of the existing
+            summaries and whose values are tuples with the summary and its
+            associated warnings, as in :meth:`get_summary`. Ids that do not
+            correspond to any summary are not included.
+        """
+
+        raise NotImplementedError
+
+    @abstractmethod
     def insert_summary(self, summary: Summary, cache: bool, warnings: dict):
         """Insert a new summary to the database.
 
@@ -57,6 +79,9 @@ class SummaryDAOInterface:
                 The warnings derived from the user request.
         """
 
+        raise NotImplementedError
+
+    @abstractmethod
     def delete_summary(self, id_: str, delete_source: bool):
         """Delete a summary.
 
@@ -67,6 +92,9 @@ class SummaryDAOInterface:
                 Whether to also delete the source.
         """
 
+        raise NotImplementedError
+
+    @abstractmethod
     def update_summary(self,
                        id_: str,
                        summary: str,  # output
@@ -74,7 +102,7 @@ class SummaryDAOInterface:
                        status: str,
                        started_at: datetime,
                        ended_at: datetime,
-                       warnings: dict):
+                       warnings: dict) -> Tuple[Optional[Summary], Optional[dict]]:
         """Update an existing summary.
 
         Args:
@@ -87,16 +115,16 @@ class SummaryDAOInterface:
             is not any summary with the specified id.
         """
 
+        raise NotImplementedError
+
+    @abstractmethod
     def update_source(self,
-                      old_source: str,
                       new_source: str,
                       old_summary_id: str,
                       new_summary_id: str):
-        """Update a source text.
+        """Update the source text of a summary.
 
         Args:
-            old_source (:obj:`str`):
-                The previous source.
             new_source (:obj:`str`):
                 The new source.
             old_summary_id (:obj:`str`):
@@ -106,6 +134,9 @@ class SummaryDAOInterface:
                 That is why this and the previous parameter must be provided.
         """
 
+        raise NotImplementedError
+
+    @abstractmethod
     def update_preprocessed_id(self,
                                raw_id: str,
                                new_preprocessed_id: str):
@@ -121,6 +152,9 @@ class SummaryDAOInterface:
                 The id of the summary once its source has been preprocessed.
         """
 
+        raise NotImplementedError
+
+    @abstractmethod
     def update_cache_true(self, id_: str):
         """Start caching a summary.
 
@@ -138,7 +172,10 @@ class SummaryDAOInterface:
                 The raw id (not to be confused with the preprocessed id).
         """
 
-    def summary_exists(self, id_: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def summary_exists(self, id_: str) -> bool:
         """Check whether a summary already exists in the DB.
 
         Args:
@@ -149,7 +186,10 @@ class SummaryDAOInterface:
             :obj:`bool`: Whether the summary exists or not.
         """
 
-    def source_exists(self, source: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def source_exists(self, source: str) -> bool:
         """Check whether a source (original text) already exists in the DB.
 
         Args:
@@ -160,7 +200,10 @@ class SummaryDAOInterface:
             :obj:`bool`: Whether the source exists or not.
         """
 
-    def increment_summary_count(self, id_: str):
+        raise NotImplementedError
+
+    @abstractmethod
+    def increment_summary_count(self, id_: str) -> int:
         """Increments the summary count, i.e., the times a summary has been requested.
 
         Args:
@@ -171,6 +214,27 @@ class SummaryDAOInterface:
             :obj:`int`: the summary count.
         """
 
+        raise NotImplementedError
+
+    @abstractmethod
+    def increment_summary_counts(self, ids: list) -> dict:
+        """Increments the count of several summaries at once.
+
+        An id can appear more than once, in which case the count of its summary
+        is incremented as many times.
+
+        Args:
+            ids (:obj:`list`):
+                The summary ids.
+
+        Returns:
+            :obj:`dict`: A dictionary whose keys are the ids of the (preprocessed)
+            summaries and whose values are their updated counts.
+        """
+
+        raise NotImplementedError
+
+    @abstractmethod
     def delete_if_not_cache(self, id_: str):
         """Check if a summary should be cached and if not delete it.
 
@@ -183,6 +247,9 @@ class SummaryDAOInterface:
                 The raw id (not to be confused with the preprocessed id).
         """
 
+        raise NotImplementedError
+
+    @abstractmethod
     def cleanup_cache(self, older_than_seconds: int):
         """Delete summaries with cache set to ``False`` with a certain age in seconds.
 
@@ -193,3 +260,11 @@ class SummaryDAOInterface:
                 cache set to ``False``and requested before ``older_than_seconds``
                 seconds will be deleted when calling this method.
         """
+
+        raise NotImplementedError
+
+    @abstractmethod
+    def close(self):
+        """Close all the connections to the database."""
+
+        raise NotImplementedError
@@ -17,13 +17,16 @@
 
 """Summary Data Access Object (DAO) Implementation."""
 
-__version__ = '0.1.8'
+__version__ = '0.1.27'
 
 import logging
 import psycopg2
+import psycopg2.pool
 import hashlib
-from io import StringIO
-from collections import OrderedDict
+import functools
+import weakref
+import threading
+from psycopg2 import sql
 from psycopg2.extras import Json
 from summary_dao_interface import SummaryDAOInterface
 from schemas import Summary
@@ -32,6 +35,117 @@ from supported_models import SupportedModel
 from supported_languages import SupportedLanguage
 from datetime import datetime
 
+# Number of connections kept open in the pool. The pool closes the returned
+# connections beyond POOL_MIN_CONNECTIONS, which would have to be reopened
+# (and their statements prepared again) the next time, so all of them are kept.
+POOL_MAX_CONNECTIONS = 16
+POOL_MIN_CONNECTIONS = POOL_MAX_CONNECTIONS
+
+# Hot statements, prepared once per connection (see SummaryDAOPostgresql._connect)
+# so that Postgres does not have to parse and plan them in every call.
+PREPARED_STATEMENTS = {
+    # The last access is updated and the summary is retrieved
+    # in the same round-trip
+    "stmt_get_summary": """WITH id_binding AS (
+                               UPDATE jizt.id_raw_id_preprocessed
+                               SET last_accessed = NOW()
+                               WHERE id_raw = $1
+                               RETURNING id_preprocessed, warnings
+                           )
+                           SELECT summary_id, content, summary, model_name,
+                                  params, status, started_at, ended_at,
+                                  language_tag, warnings
+                           FROM id_binding JOIN jizt.summary
+                                ON id_preprocessed = summary_id JOIN jizt.source
+                                USING (source_id)""",
+    # The last access is updated and the existence is checked
+    # in the same round-trip
+    "stmt_summary_exists": """UPDATE jizt.id_raw_id_preprocessed
+                              SET last_accessed = NOW()
+                              WHERE id_raw = $1
+                              RETURNING id_raw""",
+    "stmt_increment_summary_count": """UPDATE jizt.summary
+                                       SET request_count = request_count + 1
+                                       FROM jizt.id_raw_id_preprocessed
+                                       WHERE id_raw = $1
+                                             AND id_preprocessed = summary_id
+                                       RETURNING request_count""",
+    # The source is only inserted if it is not already stored, and the
+    # summary and its id binding are inserted in the same round-trip
+    "stmt_insert_summary": """WITH new_source AS (
+                                  INSERT INTO jizt.source
+                                  VALUES ($1, $2, $3)
+                                  ON CONFLICT (source_id) DO NOTHING
+                              ), new_summary AS (
+                                  INSERT INTO jizt.summary
+                                  VALUES ($4, $1, $5, $6, $7, $8, $9, $10,
+                                          $11, $12)
+                              )
+                              INSERT INTO jizt.id_raw_id_preprocessed
+                              VALUES ($4, $4, $13, NOW(), $14)"""
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _update_summary_sql(keys: tuple) -> sql.Composed:
+    """Compose the statement that updates a summary.
+
+    Callers update the same few combinations of columns, so the composed
+    statements are cached. The keys are expected to be sorted, so that each
+    combination of columns maps to a single cache entry.
+
+    Single round-trip: the binding row (last access and warnings) and the
+    summary are updated in the same statement, which also returns the same
+    columns as :meth:`SummaryDAOPostgresql.get_summary`. If the summary does
+    not exist, no rows are returned. If there are no columns to update, only
+    the binding row is updated and the summary is just selected.
+
+    Args:
+        keys (:obj:`tuple`):
+            The names of the columns of the table ``summary`` to update.
+
+    Returns:
+        :obj:`psycopg2.sql.Composed`: The statement. Its parameters are the
+        warnings, the raw id and then the values of the columns, in the same
+        order as :obj:`keys`.
+    """
+
+    if not keys:
+        return sql.SQL(
+            """WITH id_binding AS (
+                   UPDATE jizt.id_raw_id_preprocessed
+                   SET last_accessed = NOW(),
+                       warnings = %s
+                   WHERE id_raw = %s
+                   RETURNING id_preprocessed, warnings
+               )
+               SELECT summary_id, content, summary, model_name, params,
+                      status, started_at, ended_at, language_tag, warnings
+               FROM id_binding JOIN jizt.summary
+                    ON id_preprocessed = summary_id JOIN jizt.source
+                    USING (source_id);"""
+        )
+
+    return sql.SQL(
+        """WITH id_binding AS (
+               UPDATE jizt.id_raw_id_preprocessed
+               SET last_accessed = NOW(),
+                   warnings = %s
+               WHERE id_raw = %s
+               RETURNING id_preprocessed, warnings
+           )
+           UPDATE jizt.summary
+           SET {set_clause}
+           FROM id_binding, jizt.source
+           WHERE summary_id = id_binding.id_preprocessed
+                 AND jizt.source.source_id = jizt.summary.source_id
+           RETURNING summary_id, content, summary, model_name, params,
+                     status, started_at, ended_at, language_tag,
+                     id_binding.warnings;"""
+    ).format(set_clause=sql.SQL(", ").join(
+        sql.SQL("{} = %s").format(sql.Identifier(key)) for key in keys
+    ))
+
 
 class SummaryDAOPostgresql(SummaryDAOInterface):  # TODO: manage errors in excepts
     """Summary DAO implementation for Postgresql.
@@ -52,96 +166,105 @@ class SummaryDAOPostgresql(SummaryDAOInterface):  # TODO: manage errors in excep
         self.user = user
         self.password = password
 
+        # Connections are reused across requests instead of opening
+        # a new one (TCP handshake + auth) in every method call
+        self._pool = psycopg2.pool.ThreadedConnectionPool(
+            POOL_MIN_CONNECTIONS,
+            POOL_MAX_CONNECTIONS,
+            host=self.host,
+            dbname=self.dbname,
+            user=self.user,
+            password=self.password
+        )
+        # The pool raises an error instead of waiting when all its connections
+        # are in use, so the threads wait here for one to be given back
+        self._pool_slots = threading.BoundedSemaphore(POOL_MAX_CONNECTIONS)
+        # Connections in which the PREPARED_STATEMENTS have been prepared
+        self._prepared_conns = weakref.WeakSet()
+
     def get_summary(self, id_: str):
         """See base class."""
 
-        SQL = """SELECT summary_id, content, summary, model_name, params,
-                        status, started_at, ended_at, language_tag, warnings
-                 FROM jizt.id_raw_id_preprocessed JOIN jizt.summary
-                      ON id_preprocessed = summary_id JOIN jizt.source
-                      USING (source_id)
-                 WHERE id_raw = %s;"""
-
-        SQL_UPDATE_LAST_ACCESSED = """UPDATE jizt.id_raw_id_preprocessed
-                                      SET last_accessed = %s
-                                      WHERE id_raw = %s;"""
+        SQL = "EXECUTE stmt_get_summary (%s);"
 
         conn = None
         try:
             conn = self._connect()
             with conn.cursor() as cur:
-                cur.execute(SQL_UPDATE_LAST_ACCESSED, (datetime.now(), id_))
                 cur.execute(SQL, (id_,))
                 summary_row = cur.fetchone()
                 conn.commit()
                 if summary_row is not None:
-                    return Summary(
-                        id_=summary_row[0],
-                        source=summary_row[1],
-                        output=summary_row[2],
-                        model=SupportedModel(summary_row[3]),
-                        params=summary_row[4],
-                        status=SummaryStatus(summary_row[5]),
-                        started_at=summary_row[6],
-                        ended_at=summary_row[7],
-                        language=SupportedLanguage(summary_row[8])
-                    ), summary_row[9]  # warnings
+                    return self._summary_from_row(summary_row)
                 return (None, None)  # summary doesn't exist
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
-    def insert_summary(self, summary: Summary, cache: bool, warnings: dict):
+    def get_summaries(self, ids: list):
         """See base class."""
 
-        SQL_GET_SOURCE = """SELECT source_id
-                            FROM jizt.source
-                            WHERE source_id = %s;"""
+        if not ids:
+            return {}
+
+        # Same as in get_summary, but for all the ids in a single round-trip
+        SQL = """WITH id_binding AS (
+                     UPDATE jizt.id_raw_id_preprocessed
+                     SET last_accessed = NOW()
+                     WHERE id_raw = ANY(%s)
+                     RETURNING id_raw, id_preprocessed, warnings
+                 )
+                 SELECT id_raw, summary_id, content, summary, model_name, params,
+                        status, started_at, ended_at, language_tag, warnings
+                 FROM id_binding JOIN jizt.summary
+                      ON id_preprocessed = summary_id JOIN jizt.source
+                      USING (source_id);"""
 
-        SQL_INSERT_SOURCE = """INSERT INTO jizt.source
-                               VALUES (%s, %s, %s);"""
+        conn = None
+        try:
+            conn = self._connect()
+            with conn.cursor() as cur:
+                cur.execute(SQL, (list(ids),))
+                summary_rows = cur.fetchall()
+                conn.commit()
+                return {row[0]: self._summary_from_row(row[1:])
+                        for row in summary_rows}
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error(error)
+        finally:
+            if conn is not None:
+                self._release(conn)
 
-        SQL_INSERT_SUMMARY = """INSERT INTO jizt.summary
-                                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s);"""
+    def insert_summary(self, summary: Summary, cache: bool, warnings: dict):
+        """See base class."""
 
-        SQL_INSERT_ID = """INSERT INTO jizt.id_raw_id_preprocessed
-                           VALUES (%s, %s, %s, %s, %s);"""
+        SQL = ("EXECUTE stmt_insert_summary (%s, %s, %s, %s, %s, %s, %s, "
+               "%s, %s, %s, %s, %s, %s, %s);")
 
         conn = None
         try:
             conn = self._connect()
             with conn.cursor() as cur:
-                source_id = self._get_unique_key(summary.source)
-                cur.execute(SQL_GET_SOURCE, (source_id,))
-                retrieved_source_id = cur.fetchone()
-                if retrieved_source_id is None:
-                    cur.execute(
-                        SQL_INSERT_SOURCE,
-                        (source_id, summary.source, len(summary.source))
-                    )
                 output_length = (len(summary.output) if summary.output is not None
                                  else None)
                 cur.execute(
-                    SQL_INSERT_SUMMARY,
-                    (summary.id_, source_id,
-                     summary.output, output_length,
+                    SQL,
+                    (self._get_unique_key(summary.source),
+                     summary.source, len(summary.source),
+                     summary.id_, summary.output, output_length,
                      summary.model, Json(summary.params),
                      summary.status, summary.started_at,
-                     summary.ended_at, summary.language)
+                     summary.ended_at, summary.language,
+                     cache, Json(warnings))
                 )
-                cur.execute(SQL_INSERT_ID, (summary.id_,
-                                            summary.id_,
-                                            cache,
-                                            datetime.now(),
-                                            Json(warnings)))
                 conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
     def delete_summary(self,
                        id_: str,
@@ -171,7 +294,7 @@ class SummaryDAOPostgresql(SummaryDAOInterface):  # TODO: manage errors in excep
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
     def update_summary(self,
                        id_: str,
@@ -183,63 +306,53 @@ class SummaryDAOPostgresql(SummaryDAOInterface):  # TODO: manage errors in excep
                        warnings: dict = None):
         """See base class."""
 
-        args = OrderedDict({key: value for key, value in locals().items()
-                            if value is not None and key not in ('self', 'id_')})
-
-        # Convert dicts to Json
-        dicts = [key for key in args if isinstance(args[key], dict)]
-        for key in dicts:
-            args[key] = Json(args[key])
-
-        if "warnings" in args:
-            warnings = args.pop("warnings")
-
-        keys = list(args.keys())
-        values = list(args.values()) + [id_]
-        concat = StringIO()
-        concat.write("UPDATE jizt.summary SET ")
-        for field in keys[:-1]:
-            concat.write(f"{field} = %s, ")
-        concat.write(f"{keys[-1]} = %s ")
-        concat.write("FROM jizt.id_raw_id_preprocessed ")
-        concat.write("WHERE id_raw = %s AND id_preprocessed = summary_id;")
-
-        SQL_UPDATE_SUMMARY = concat.getvalue()
-        SQL_UPDATE_WARNINGS = """UPDATE jizt.id_raw_id_preprocessed
-                                 SET warnings = %s
-                                 WHERE id_raw = %s;"""
-
-        if self.summary_exists(id_):
-            conn = None
-            try:
-                conn = self._connect()
-                with conn.cursor() as cur:
-                    cur.execute(SQL_UPDATE_SUMMARY, values)  # values is a list!
-                    cur.execute(SQL_UPDATE_WARNINGS, (warnings, id_))
-                    conn.commit()
-                    return self.get_summary(id_)
-            except (Exception, psycopg2.DatabaseError) as error:
-                self.logger.error(error)
-            finally:
-                if conn is not None:
-                    conn.close()
-        else:
-            return (None, None)
+        keys = []
+        values = [Json(warnings) if warnings is not None else None, id_]
+        # In alphabetical order, so that the same columns always hit the
+        # same cached statement
+        for key, value in (("ended_at", ended_at), ("params", params),
+                           ("started_at", started_at), ("status", status),
+                           ("summary", summary)):
+            if value is not None:
+                keys.append(key)
+                values.append(Json(value) if isinstance(value, dict) else value)
+        keys = tuple(keys)
+
+        SQL_UPDATE_SUMMARY = _update_summary_sql(keys)
+
+        conn = None
+        try:
+            conn = self._connect()
+            with conn.cursor() as cur:
+                cur.execute(SQL_UPDATE_SUMMARY, values)  # values is a list!
+                summary_row = cur.fetchone()
+                conn.commit()
+                if summary_row is not None:
+                    return self._summary_from_row(summary_row)
+                return (None, None)  # summary doesn't exist
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error(error)
+        finally:
+            if conn is not None:
+                self._release(conn)
 
     def update_source(self,
-                      old_source: str,
                       new_source: str,
                       old_summary_id: str,
                       new_summary_id: str):
         """See base class."""
 
         # The source id is also modified in the summary table
-        # because of ON UPDATE CASCADE
+        # because of ON UPDATE CASCADE. The old source is the one
+        # of the summary, so it does not need to be hashed again
         SQL_UPDATE_SOURCE = """UPDATE jizt.source
                                SET source_id = %s,
                                    content = %s,
                                    content_length = %s
-                               WHERE source_id = %s;"""
+                               WHERE source_id = (
+                                   SELECT source_id FROM jizt.summary
+                                   WHERE summary_id = %s
+                               );"""
 
         # The id in id_raw_id_preprocessed is also updated
         # because of ON UPDATE CASCADE
@@ -251,29 +364,30 @@ class SummaryDAOPostgresql(SummaryDAOInterface):  # TODO: manage errors in excep
         # can be also retrieved with its preprocessed id
         SQL_INSERT_PREPROCESSED_ID = """INSERT INTO jizt.id_raw_id_preprocessed
                                         (id_raw, id_preprocessed, cache, last_accessed)
-                                        SELECT %s, %s, cache, %s
+                                        SELECT %s, %s, cache, NOW()
                                         FROM jizt.id_raw_id_preprocessed
                                         WHERE id_raw = %s;"""
 
+        # The statements depend on the cascades of the previous ones, so they
+        # cannot be merged into a CTE, but they are still sent together and
+        # run in order in a single round-trip
+        SQL = SQL_UPDATE_SOURCE + SQL_UPDATE_SUMMARY_ID + SQL_INSERT_PREPROCESSED_ID
+
         conn = None
         try:
             conn = self._connect()
             with conn.cursor() as cur:
-                old_source_id = self._get_unique_key(old_source)
                 new_source_id = self._get_unique_key(new_source)
-                cur.execute(SQL_UPDATE_SOURCE, (new_source_id, new_source,
-                                                len(new_source), old_source_id))
-                cur.execute(SQL_UPDATE_SUMMARY_ID, (new_summary_id, old_summary_id))
-                cur.execute(SQL_INSERT_PREPROCESSED_ID, (new_summary_id,
-                                                         new_summary_id,
-                                                         datetime.now(),
-                                                         old_summary_id))
+                cur.execute(SQL, (new_source_id, new_source, len(new_source),
+                                  old_summary_id,
+                                  new_summary_id, old_summary_id,
+                                  new_summary_id, new_summary_id, old_summary_id))
                 conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
     def update_preprocessed_id(self,
                                raw_id: str,
@@ -281,50 +395,54 @@ class SummaryDAOPostgresql(SummaryDAOInterface):  # TODO: manage errors in excep
         """See base class."""
 
         SQL_UPDATE_ID = """UPDATE jizt.id_raw_id_preprocessed
-                           SET id_preprocessed = %s,
-                               last_accessed = %s
-                           WHERE id_raw = %s
-                           RETURNING cache;"""
+                           SET id_preprocessed = %(new_preprocessed_id)s,
+                               last_accessed = NOW()
+                           WHERE id_raw = %(raw_id)s;"""
 
+        # The rest of the statements only have effect if the binding of
+        # the raw id existed, so they can be sent along with the first one
+        # and run in order in a single round-trip
         SQL_UPDATE_CACHE = """UPDATE jizt.id_raw_id_preprocessed
-                              SET cache = %s,
-                                  last_accessed = %s
-                              WHERE id_raw = %s AND cache = FALSE;"""
+                              SET cache = raw_binding.cache,
+                                  last_accessed = NOW()
+                              FROM jizt.id_raw_id_preprocessed AS raw_binding
+                              WHERE raw_binding.id_raw = %(raw_id)s AND
+                                    id_raw_id_preprocessed.id_raw
+                                        = %(new_preprocessed_id)s AND
+                                    id_raw_id_preprocessed.cache = FALSE;"""
 
         # Because of ON DELETE CASCADE, this will delete both the
         # source and the summary
         SQL_DELETE_SUMMARY_OLD = """DELETE FROM jizt.source
                                     WHERE source_id = (
                                         SELECT source_id FROM jizt.summary
-                                        WHERE summary_id = %s
+                                        WHERE summary_id = %(raw_id)s
+                                    ) AND EXISTS (
+                                        SELECT 1 FROM jizt.id_raw_id_preprocessed
+                                        WHERE id_raw = %(raw_id)s
                                     );"""
 
+        SQL = SQL_UPDATE_ID + SQL_UPDATE_CACHE + SQL_DELETE_SUMMARY_OLD
+
         conn = None
         try:
             conn = self._connect()
             with conn.cursor() as cur:
-                cur.execute(SQL_UPDATE_ID, (new_preprocessed_id,
-                                            datetime.now(),
-                                            raw_id))
-                cache = cur.fetchone()
-                if cache is not None:
-                    cur.execute(SQL_UPDATE_CACHE, (cache[0],
-                                                   datetime.now(),
-                                                   new_preprocessed_id))
-                    cur.execute(SQL_DELETE_SUMMARY_OLD, (raw_id,))
+                cur.execute(SQL, {"raw_id": raw_id,
+                                  "new_preprocessed_id": new_preprocessed_id})
                 conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
     def update_cache_true(self, id_: str):
         """See base class."""
 
         SQL = """UPDATE jizt.id_raw_id_preprocessed
                  SET cache = TRUE,
-                     last_accessed = %s
+                     last_accessed = NOW()
                  WHERE CACHE = FALSE AND (id_raw = %s OR id_raw IN (
                      SELECT id_preprocessed
                      FROM jizt.id_raw_id_preprocessed
@@ -335,37 +453,31 @@ class SummaryDAOPostgresql(SummaryDAOInterface):  # TODO: manage errors in excep
         try:
             conn = self._connect()
             with conn.cursor() as cur:
-                cur.execute(SQL, (datetime.now(), id_, id_))
+                cur.execute(SQL, (id_, id_))
                 conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
     def summary_exists(self, id_: str):
         """See base class."""
 
-        SQL_SELECT = """SELECT id_raw FROM jizt.id_raw_id_preprocessed
-                        WHERE id_raw = %s;"""
-
-        SQL_UPDATE_LAST_ACCESSED = """UPDATE jizt.id_raw_id_preprocessed
-                                      SET last_accessed = %s
-                                      WHERE id_raw = %s;"""
+        SQL = "EXECUTE stmt_summary_exists (%s);"
 
         conn = None
         try:
             conn = self._connect()
             with conn.cursor() as cur:
-                cur.execute(SQL_UPDATE_LAST_ACCESSED, (datetime.now(), id_))
-                cur.execute(SQL_SELECT, (id_,))
+                cur.execute(SQL, (id_,))
                 conn.commit()
                 return cur.fetchone() is not None
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
     def source_exists(self, source: str):
         """See base class."""
@@ -384,16 +496,12 @@ class SummaryDAOPostgresql(SummaryDAOInterface):  # TODO: manage errors in excep
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
     def increment_summary_count(self, id_: str):
         """See base class."""
 
-        SQL = """UPDATE jizt.summary
-                 SET request_count = request_count + 1
-                 FROM jizt.id_raw_id_preprocessed
-                 WHERE id_raw = %s AND id_preprocessed = summary_id
-                 RETURNING request_count;"""
+        SQL = "EXECUTE stmt_increment_summary_count (%s);"
 
         conn = None
         try:
@@ -406,122 +514,233 @@ class SummaryDAOPostgresql(SummaryDAOInterface):  # TODO: manage errors in excep
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
-    def delete_if_not_cache(self, id_: str):
+    def increment_summary_counts(self, ids: list):
         """See base class."""
 
-        SQL_DELETE = """DELETE FROM jizt.id_raw_id_preprocessed
-                        WHERE id_raw = %s AND cache = FALSE
-                        RETURNING id_preprocessed;"""
+        if not ids:
+            return {}
+
+        SQL = """WITH requests AS (
+                     SELECT id_preprocessed, COUNT(*) AS requests
+                     FROM UNNEST(%s::TEXT[]) AS ids(id_raw)
+                          JOIN jizt.id_raw_id_preprocessed USING (id_raw)
+                     GROUP BY id_preprocessed
+                 )
+                 UPDATE jizt.summary
+                 SET request_count = request_count + requests
+                 FROM requests
+                 WHERE summary_id = id_preprocessed
+                 RETURNING summary_id, request_count;"""
 
-        # Check if the preprocessed id has to be cached
-        SQL_CACHE = """SELECT cache FROM jizt.id_raw_id_preprocessed
-                       WHERE id_raw = %s;"""
+        conn = None
+        try:
+            conn = self._connect()
+            with conn.cursor() as cur:
+                cur.execute(SQL, (list(ids),))
+                counts = cur.fetchall()
+                conn.commit()
+                return {summary_id: count for summary_id, count in counts}
+        except (Exception, psycopg2.DatabaseError) as error:
+            self.logger.error(error)
+        finally:
+            if conn is not None:
+                self._release(conn)
 
-        # Because of ON DELETE CASCADE, this will delete both the
-        # source and the summary
-        SQL_DELETE_SUMMARY = """DELETE FROM jizt.source
-                                WHERE source_id = (
-                                    SELECT source_id FROM jizt.summary
-                                    WHERE summary_id = %s
-                                );"""
+    def delete_if_not_cache(self, id_: str):
+        """See base class."""
+
+        # The binding is deleted and, if the preprocessed summary does not
+        # have to be cached either, so are its source and the summary (because
+        # of ON DELETE CASCADE). All in a single statement
+        SQL = """WITH deleted AS (
+                     DELETE FROM jizt.id_raw_id_preprocessed
+                     WHERE id_raw = %s AND cache = FALSE
+                     RETURNING id_raw, id_preprocessed
+                 )
+                 DELETE FROM jizt.source
+                 WHERE source_id = (
+                     SELECT source_id
+                     FROM deleted JOIN jizt.summary
+                          ON id_preprocessed = summary_id
+                     WHERE id_raw = id_preprocessed OR EXISTS (
+                         -- Check if the preprocessed id has to be cached
+                         SELECT 1 FROM jizt.id_raw_id_preprocessed AS binding
+                         WHERE binding.id_raw = deleted.id_preprocessed AND
+                               binding.cache = FALSE
+                     )
+                 );"""
 
         conn = None
         try:
             conn = self._connect()
             with conn.cursor() as cur:
-                cur.execute(SQL_DELETE, (id_,))
-                preprocessed_id = cur.fetchone()
-                if preprocessed_id is not None:
-                    if id_ == preprocessed_id[0]:  # preprocessed_id is a tuple
-                        # We have already checked that cache was False
-                        cur.execute(SQL_DELETE_SUMMARY, preprocessed_id)
-                    else:
-                        cur.execute(SQL_CACHE, preprocessed_id)
-                        cache = cur.fetchone()
-                        if cache is not None and not cache[0]:
-                            cur.execute(SQL_DELETE_SUMMARY, preprocessed_id)
+                cur.execute(SQL, (id_,))
                 conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
     def cleanup_cache(self, older_than_seconds: int):
         """See base class."""
 
-        SQL_DELETE_ID_RAW = """
-                 DELETE FROM jizt.id_raw_id_preprocessed
-                 USING jizt.summary
-                 WHERE id_preprocessed = summary_id AND
-                 cache = FALSE AND status = 'completed' AND
-                 last_accessed < NOW() - (%s::TEXT || ' seconds')::INTERVAL;"""
-
-        # Delete summaries that do not correspond to any request
-        SQL_DELETE_SUMMARY = """
-                DELETE FROM jizt.summary
-                WHERE summary_id IN (
-                    SELECT summary_id
-                    FROM jizt.summary
-                    WHERE NOT EXISTS (SELECT 1 FROM jizt.id_raw_id_preprocessed
-                                      WHERE id_preprocessed = summary_id)
-                )
-                RETURNING source_id;"""
-
-        # Delete sources that do not correspond to any summary
-        SQL_DELETE_SOURCE = """DELETE FROM jizt.source
-                               WHERE source_id IN (%s);"""
+        # All the snapshots of the CTEs are the same, so the rows deleted in
+        # one of them are still visible in the following ones
+        SQL = """WITH deleted_ids AS (
+                     DELETE FROM jizt.id_raw_id_preprocessed
+                     USING jizt.summary
+                     WHERE id_preprocessed = summary_id AND
+                           cache = FALSE AND status = 'completed' AND
+                           last_accessed < NOW() - (%s::TEXT || ' seconds')::INTERVAL
+                     RETURNING id_raw
+                 ), deleted_summaries AS (
+                     -- Delete summaries that do not correspond to any request
+                     DELETE FROM jizt.summary
+                     WHERE NOT EXISTS (
+                         SELECT 1 FROM jizt.id_raw_id_preprocessed
+                         WHERE id_preprocessed = summary_id AND
+                               id_raw NOT IN (SELECT id_raw FROM deleted_ids)
+                     )
+                     RETURNING summary_id, source_id
+                 )
+                 -- Delete sources that do not correspond to any summary. The
+                 -- ids are collected once into an array, so that the sources
+                 -- are looked up through their primary key index
+                 DELETE FROM jizt.source
+                 WHERE source_id = ANY(ARRAY(SELECT DISTINCT source_id
+                                             FROM deleted_summaries)) AND
+                       NOT EXISTS (
+                           SELECT 1 FROM jizt.summary
+                           WHERE summary.source_id = source.source_id AND
+                                 summary_id NOT IN (SELECT summary_id
+                                                    FROM deleted_summaries)
+                       );"""
 
         conn = None
         try:
             conn = self._connect()
             with conn.cursor() as cur:
-                cur.execute(SQL_DELETE_ID_RAW, (older_than_seconds,))
-                cur.execute(SQL_DELETE_SUMMARY, (older_than_seconds,))
-                summaries_id = cur.fetchall()
-                if summaries_id:
-                    # Transform from e.g., [(1,), (1,), (2,)] to (1, 2, 3)
-                    summaries_id = tuple(i for tuple in set(summaries_id) for i in tuple)
-                    cur.execute(SQL_DELETE_SOURCE, summaries_id)
+                cur.execute(SQL, (older_than_seconds,))
                 conn.commit()
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error(error)
         finally:
             if conn is not None:
-                conn.close()
+                self._release(conn)
 
     @classmethod
-    def _get_unique_key(cls, text: str) -> str:
+    def _summary_from_row(cls, summary_row: tuple):
+        """Build a summary from a row of the database.
+
+        Args:
+            summary_row (:obj:`tuple`):
+                The row, with the columns ``summary_id, content, summary,
+                model_name, params, status, started_at, ended_at, language_tag,
+                warnings``.
+
+        Returns:
+            :obj:tuple(:obj:`Summary`, :obj:`dict`): A tuple with the summary
+            and its associated warnings.
+        """
+
+        return Summary(
+            id_=summary_row[0],
+            source=summary_row[1],
+            output=summary_row[2],
+            model=SupportedModel(summary_row[3]),
+            params=summary_row[4],
+            status=SummaryStatus(summary_row[5]),
+            started_at=summary_row[6],
+            ended_at=summary_row[7],
+            language=SupportedLanguage(summary_row[8])
+        ), summary_row[9]  # warnings
+
+    @classmethod
+    def _get_unique_key(cls, text: str) -> bytes:
         """Get a unique key for a text.
 
-        SHA-256 algorithm is used.
+        SHA-256 algorithm is used. :mod:`hashlib` delegates it to OpenSSL,
+        which uses the CPU SHA extensions (SHA-NI) when they are available.
+        With them, SHA-256 is faster than BLAKE2b, so there is no reason to
+        change the algorithm (which would also change the stored ids).
+
+        The raw digest is returned (instead of its hex representation), since
+        it is half the size, both on the wire and in the ``BYTEA`` column and
+        its index.
 
         Args:
             text (:obj:`str`):
                 The text to get the unique id from.
 
         Returns:
-            :obj:`str`: The unique, SHA-256 ecrypted key.
+            :obj:`bytes`: The unique, SHA-256 ecrypted key (32 bytes).
         """
 
-        return hashlib.sha256(text.encode()).hexdigest()
+        return hashlib.sha256(text.encode()).digest()
+
+    def close(self):
+        """See base class."""
+
+        self._pool.closeall()
 
     def _connect(self):
-        """Connect to the PostgreSQL database.
+        """Get a connection to the PostgreSQL database from the pool.
+
+        If all the connections are in use, this waits until one is given
+        back. The connection must be given back to the pool with
+        :meth:`_release` once it is no longer used.
+
+        The first time a connection is used, the hot statements are
+        prepared in it.
 
         Returns:
             :obj:`psycopg2.extensions.connection`: The connection
             to the PostgreSQL database.
         """
 
+        self._pool_slots.acquire()
+        conn = None
         try:
-            return psycopg2.connect(
-                host=self.host,
-                dbname=self.dbname,
-                user=self.user,
-                password=self.password
-            )
+            conn = self._pool.getconn()
+            if conn not in self._prepared_conns:
+                self._prepare_statements(conn)
+            return conn
         except (Exception, psycopg2.DatabaseError) as error:
             self.logger.error(error)
+            if conn is not None:
+                # Otherwise, the connection would never be given back
+                self._pool.putconn(conn, close=True)
+            self._pool_slots.release()
+
+    def _release(self, conn):
+        """Give a connection obtained with :meth:`_connect` back to the pool.
+
+        Args:
+            conn (:obj:`psycopg2.extensions.connection`):
+                The connection to the PostgreSQL database.
+        """
+
+        try:
+            self._pool.putconn(conn)
+        finally:
+            self._pool_slots.release()
+
+    def _prepare_statements(self, conn):
+        """Prepare the :obj:`PREPARED_STATEMENTS` in a connection.
+
+        Prepared statements only live as long as the database session, so
+        this has to be done once for every new connection.
+
+        Args:
+            conn (:obj:`psycopg2.extensions.connection`):
+                The connection to the PostgreSQL database.
+        """
+
+        with conn.cursor() as cur:
+            for name, statement in PREPARED_STATEMENTS.items():
+                cur.execute(f"PREPARE {name} AS {statement};")
+        conn.commit()
+        self._prepared_conns.add(conn)
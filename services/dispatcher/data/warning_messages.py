@@ -17,20 +17,18 @@
 
 """Warning messages."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.1'
 
-from enum import Enum
 from supported_models import SupportedModel
 from supported_languages import SupportedLanguage
 
+# Warning messages for incorrect attributes. Plain constants, since they
+# are only read.
 
-class WarningMessage(Enum):
-    """Warning messages for incorrect attributes."""
+# Model not supported
+UNSUPPORTED_MODEL = (f"The specified model is not supported. "
+                     f"Defaulting to '{SupportedModel.T5_LARGE.value}'.")
 
-    # Model not supported
-    UNSUPPORTED_MODEL = (f"The specified model is not supported. "
-                         f"Defaulting to '{SupportedModel.T5_LARGE.value}'.")
-
-    # Language not supported
-    UNSUPPORTED_LANGUAGE = (f"The specified language is not supported. "
-                            f"Defaulting to '{SupportedLanguage.ENGLISH.value}'.")
+# Language not supported
+UNSUPPORTED_LANGUAGE = (f"The specified language is not supported. "
+                        f"Defaulting to '{SupportedLanguage.ENGLISH.value}'.")
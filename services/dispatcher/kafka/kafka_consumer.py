@@ -17,20 +17,22 @@
 
 """Kafka Consumer."""
 
-__version__ = '0.1.3'
+__version__ = '0.1.21'
 
 import logging
 import socket
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from queue import Queue, Empty, Full
 from threading import Thread, Event
 from kafka_topics import KafkaTopic
 from unique_key import get_unique_key
-from confluent_kafka import DeserializingConsumer, Message, KafkaError, KafkaException
+from confluent_kafka import Consumer, Message, KafkaError, KafkaException
 from confluent_kafka.serialization import StringDeserializer
 from kafka_producer import Producer
 from data.summary_status import SummaryStatus
 from data.summary_dao_factory import SummaryDAOFactory
-from data.schemas import ConsumedMsgSchema, TextEncodingProducedMsgSchema
 
 # Interval in seconds to delete old, completed summaries that
 # have cache to False and have not been requested through an
@@ -41,6 +43,20 @@ CACHE_CLEANUP_INTERVAL_SECONDS = 1 * 60  # 1 minute
 # these seconds will be deleted.
 OLDER_THAN_SECONDS = 4 * 60  # 4 min
 
+# Maximum number of messages retrieved from the consumer queue at once.
+CONSUME_NUM_MESSAGES = 500
+
+# Seconds to wait for a batch of messages. It is set to 1.5 times
+# the 'fetch.wait.max.ms' of the consumer configuration.
+CONSUME_TIMEOUT_SECONDS = 0.3
+
+# Maximum number of batches fetched in advance while the current
+# one is being processed.
+PREFETCH_BATCHES = 2
+
+# Number of threads updating the status of the summaries of a batch.
+STATUS_UPDATE_WORKERS = 4
+
 
 class StoppableThread(Thread):
     """Stoppable Thread.
@@ -94,117 +110,309 @@ class ConsumerLoop(StoppableThread):
                   'client.id': socket.gethostname(),
                   'group.id': "dispatcher",
                   'auto.offset.reset': "earliest",
-                  'session.timeout.ms': 10000,
+                  # Processing a whole batch must not trigger a rebalance
+                  'session.timeout.ms': 30000,
+                  'max.poll.interval.ms': 300000,  # default
+                  # Favour larger fetches, since the messages contain texts
+                  'fetch.min.bytes': 65536,
+                  'fetch.wait.max.ms': 200,
+                  'fetch.max.bytes': 10 * 1024 * 1024,
+                  'max.partition.fetch.bytes': 2 * 1024 * 1024,
                   'enable.auto.commit': True,  # default
                   'auto.commit.interval.ms': 5000,  # default
-                  'key.deserializer': StringDeserializer('utf_8'),
-                  'value.deserializer': StringDeserializer('utf_8')}
-        self.consumer = DeserializingConsumer(config)
+                  # Batches are fetched in advance, so offsets are only stored
+                  # (and then auto-committed) once their messages are processed
+                  'enable.auto.offset.store': False}
+        # The DeserializingConsumer does not implement consume(), so the
+        # keys are deserialized in the consumer loop. The values are kept as
+        # bytes, which orjson parses directly.
+        self.consumer = Consumer(config)
+        self.string_deserializer = StringDeserializer('utf_8')
         self.producer = Producer()
         self.db = db
-        self.consumed_msg_schema = ConsumedMsgSchema()
-        self.text_encoding_produced_msg_schema = TextEncodingProducedMsgSchema()
+        self.status_update_executor = ThreadPoolExecutor(
+            max_workers=STATUS_UPDATE_WORKERS
+        )
 
     def run(self):
+        fetcher = cleaner = None
         try:
             topics_to_subscribe = [KafkaTopic.DISPATCHER.value]
             self.consumer.subscribe(topics_to_subscribe)
             self.logger.debug(f'Consumer subscribed to topic(s): '
                               f'{topics_to_subscribe}')
-            previous_cache_cleanup = datetime.now()
-            while not self.stopped():
-                if ((datetime.now() - previous_cache_cleanup).total_seconds() >
-                        CACHE_CLEANUP_INTERVAL_SECONDS):
-                    self.db.cleanup_cache(OLDER_THAN_SECONDS)
-                    previous_cache_cleanup = datetime.now()
-                msg = self.consumer.poll(timeout=1.0)
-                if msg is None:
+            # The next batches are fetched in another thread while the
+            # current one is processed
+            batches = Queue(maxsize=PREFETCH_BATCHES)
+            fetcher = Thread(target=self._fetch_batches, args=(batches,))
+            fetcher.start()
+            # The cache is cleaned up in its own thread, so that the cleanup
+            # does not delay the processing of the messages
+            cleaner = Thread(target=self._cleanup_cache_periodically)
+            cleaner.start()
+            # Once stopped, the already fetched batches are still processed
+            while not (self.stopped() and batches.empty()):
+                try:
+                    msgs = batches.get(timeout=1.0)
+                except Empty:
                     continue
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
-                        # End of partition event
-                        self.logger.error(f'{msg.topic()} in partition {msg.partition} '
-                                          f'{msg.partition()} reached end at offset '
-                                          f'{msg.offset()}')
-                    elif msg.error():
-                        self.logger.error("Undefined error in consumer loop")
-                        raise KafkaException(msg.error())
-                else:
-                    self.logger.debug(
-                        f'Message consumed: [key]: {msg.key()}, '
-                        f'[value]: "{msg.value()[:500]} [...]"'
-                    )
-
-                    data = self.consumed_msg_schema.loads(msg.value())
-
-                    if data["summary_status"] == SummaryStatus.PREPROCESSING.value:
-                        id_preprocessed = get_unique_key(
-                            data["text_preprocessed"],
-                            data["model"],
-                            data["params"]
-                        )
-                        summary, _ = self.db.get_summary(id_preprocessed)
-                        if (summary is not None and
-                                summary.status == SummaryStatus.COMPLETED.value):
-                            # Only update the id in case it is necessary
-                            if msg.key() != id_preprocessed:
-                                self.db.update_preprocessed_id(msg.key(), id_preprocessed)
-                            self.logger.debug("Summary with preprocessed text already "
-                                              "exists. Not producing to Encoder.")
-                        else:
-                            old_source = self.db.get_summary(msg.key())[0].source
-                            self.db.update_source(old_source,
-                                                  data["text_preprocessed"],
-                                                  msg.key(),
-                                                  id_preprocessed)
-                            del data["summary_status"]
-                            message_value = self.text_encoding_produced_msg_schema.dumps(data)
-                            self._produce_message(KafkaTopic.TEXT_ENCODING.value,
-                                                  msg.key(),
-                                                  message_value)
-                            # If the preprocessor generated warnings, we would have to
-                            # update the DB here (for now it doesn't produce them)
-                            self.logger.debug("Preprocessed text does not exist. "
-                                              "Producing to Encoder.")
-                        count = self.db.increment_summary_count(msg.key())
-                        self.logger.debug(f"Current summary count: {count}.")
+                batch = []
+                for msg in msgs:
+                    if msg.error():
+                        if msg.error().code() == KafkaError._PARTITION_EOF:
+                            # End of partition event
+                            self.logger.error(f'{msg.topic()} in partition '
+                                              f'{msg.partition()} reached end at '
+                                              f'offset {msg.offset()}')
+                        elif msg.error():
+                            self.logger.error("Undefined error in consumer loop")
+                            raise KafkaException(msg.error())
                     else:
-                        # Update warnings
-                        warnings = self._update_warnings(
-                            self.db.get_summary(msg.key())[1],  # previous warnings
-                            data.pop('warnings', {})
-                        )
-                        # Important: keys must match DB columns
-                        update_columns = {"status": data["summary_status"],
-                                          "warnings": warnings}
-                        if data["summary_status"] == SummaryStatus.COMPLETED.value:
-                            update_columns.update({
-                                "ended_at": datetime.now(),
-                                "summary": data["output"],
-                                "params": data["params"]  # validated params
-                            })
-                        summary, _ = self.db.update_summary(msg.key(), **update_columns)
-                        self.logger.debug(f"Consumer message processed. "
-                                          f"Summary updated: {summary}")
+                        msg.set_key(self.string_deserializer(msg.key(), None))
+                        batch.append(msg)
+                if batch:
+                    self._process_batch(batch)
+                    for msg in batch:
+                        self.consumer.store_offsets(message=msg)
         finally:
+            self.stop()  # the fetcher has to be stopped as well if anything failed
+            if fetcher is not None:
+                fetcher.join()
+            if cleaner is not None:
+                cleaner.join()
             self.logger.debug("Consumer loop stopped. Closing consumer...")
             self.consumer.close()  # close down consumer to commit final offsets
+            self.producer.flush(timeout=5.0)  # deliver the pending messages
+            self.status_update_executor.shutdown()
+
+    def _cleanup_cache_periodically(self):
+        """Clean up the cache every :const:`CACHE_CLEANUP_INTERVAL_SECONDS`.
+
+        This is done until the consumer loop is stopped.
+        """
+
+        # wait() returns as soon as the loop is stopped
+        while not self._stop_event.wait(CACHE_CLEANUP_INTERVAL_SECONDS):
+            self.db.cleanup_cache(OLDER_THAN_SECONDS)
+
+    def _fetch_batches(self, batches: Queue):
+        """Fetch batches of messages until the consumer loop is stopped.
+
+        Messages are retrieved in batches to reduce the overhead of going
+        through librdkafka for each one of them.
+
+        Args:
+            batches (:obj:`queue.Queue`):
+                The queue in which the fetched batches are put.
+        """
+
+        try:
+            while not self.stopped():
+                msgs = self.consumer.consume(num_messages=CONSUME_NUM_MESSAGES,
+                                             timeout=CONSUME_TIMEOUT_SECONDS)
+                if not msgs:
+                    continue
+                while not self.stopped():
+                    try:
+                        batches.put(msgs, timeout=1.0)
+                        break
+                    except Full:
+                        continue
+        except Exception as error:
+            self.logger.error(f"Error fetching messages: {error}")
+            self.stop()
+
+    def _process_batch(self, msgs: list):
+        """Process a batch of consumed messages.
+
+        The previous warnings of the summaries to update are retrieved with a
+        single query, and so are incremented the counts of the summaries whose
+        text has been preprocessed, instead of querying the database for each
+        message.
+
+        The status updates of different summaries are independent of each
+        other, so they are carried out in the :attr:`status_update_executor`
+        while the preprocessed messages are processed. The updates of the same
+        summary are still applied in order.
+
+        Args:
+            msgs (:obj:`list`):
+                The consumed messages (:obj:`confluent_kafka.Message`).
+        """
+
+        # The debug messages are only built if they are going to be logged
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        status_updates = {}  # summary id -> [data, ...]
+        preprocessed = []  # [(summary id, data), ...]
+        for msg in msgs:
+            # Each call to key() or value() builds a new Python object
+            key = msg.key()
+            value = msg.value()
+            if debug:
+                self.logger.debug(
+                    f'Message consumed: [key]: {key}, '
+                    f'[value]: "{value[:500].decode("utf-8", "replace")} [...]"'
+                )
+            # The messages are produced by our own microservices, which already
+            # validate them when dumping them (see DispatcherProducedMsgSchema
+            # in each of them), so they are trusted and only parsed here
+            data = orjson.loads(value)
+            if data["summary_status"] == SummaryStatus.PREPROCESSING.value:
+                preprocessed.append((key, data))
+            else:
+                status_updates.setdefault(key, []).append(data)
+
+        summaries = self.db.get_summaries(list(status_updates))
+
+        futures = [
+            self.status_update_executor.submit(
+                self._process_status_messages,
+                id_,
+                updates,
+                summaries.get(id_, (None, None))[1]  # previous warnings
+            )
+            for id_, updates in status_updates.items()
+        ]
+        preprocessed_ids = []
+        for id_, data in preprocessed:
+            self._process_preprocessed_message(id_, data)
+            preprocessed_ids.append(id_)
+        for future in futures:
+            future.result()  # raises the exception of the update, if any
+
+        if preprocessed_ids:
+            counts = self.db.increment_summary_counts(preprocessed_ids)
+            self.logger.debug("Current summary counts: %s.", counts)
+        # Serve the delivery callbacks of the whole batch without blocking
+        self.producer.poll(0)
+
+    def _process_preprocessed_message(self, id_: str, data: dict):
+        """Process a message with a preprocessed text.
+
+        Args:
+            id_ (:obj:`str`):
+                The key of the consumed message, i.e., the summary id.
+            data (:obj:`dict`):
+                The loaded message value.
+        """
+
+        id_preprocessed = get_unique_key(
+            data["text_preprocessed"],
+            data["model"],
+            data["params"]
+        )
+        summary, _ = self.db.get_summary(id_preprocessed)
+        # If the summary with the preprocessed text is already completed or
+        # being generated (e.g. the same text was requested several times
+        # concurrently), the request is bound to it, so that it is generated
+        # only once. Note that if the raw and preprocessed ids are the same,
+        # the summary found is the one of this very request.
+        if (summary is not None and
+                (summary.status == SummaryStatus.COMPLETED.value or
+                 id_ != id_preprocessed)):
+            # Only update the id in case it is necessary
+            if id_ != id_preprocessed:
+                self.db.update_preprocessed_id(id_, id_preprocessed)
+            self.logger.debug("Summary with preprocessed text already "
+                              "exists. Not producing to Encoder.")
+        else:
+            self.db.update_source(data["text_preprocessed"],
+                                  id_,
+                                  id_preprocessed)
+            # The fields of the encoder's TextEncodingsConsumedMsgSchema. The
+            # bytes are produced as they are, with no need to decode them.
+            message_value = orjson.dumps({
+                "text_preprocessed": data["text_preprocessed"],
+                "model": data["model"],
+                "params": data["params"],
+                "stream_status": data.get("stream_status", False)
+            })
+            self._produce_message(KafkaTopic.TEXT_ENCODING.value,
+                                  id_,
+                                  message_value)
+            # If the preprocessor generated warnings, we would have to
+            # update the DB here (for now it doesn't produce them)
+            self.logger.debug("Preprocessed text does not exist. "
+                              "Producing to Encoder.")
+
+    def _process_status_messages(self,
+                                 id_: str,
+                                 updates: list,
+                                 prev_warnings: dict):
+        """Process, in order, the messages that update the status of a summary.
+
+        Args:
+            id_ (:obj:`str`):
+                The key of the consumed messages, i.e., the summary id.
+            updates (:obj:`list`):
+                The loaded values of the consumed messages.
+            prev_warnings (:obj:`dict`):
+                The previous warnings of the summary.
+        """
+
+        for data in updates:
+            # Each message must see the warnings updated by the previous one
+            _, prev_warnings = self._process_status_message(id_,
+                                                            data,
+                                                            prev_warnings)
+
+    def _process_status_message(self,
+                                id_: str,
+                                data: dict,
+                                prev_warnings: dict):
+        """Process a message that updates the status of a summary.
+
+        Args:
+            id_ (:obj:`str`):
+                The key of the consumed message, i.e., the summary id.
+            data (:obj:`dict`):
+                The loaded message value.
+            prev_warnings (:obj:`dict`):
+                The previous warnings of the summary.
+
+        Returns:
+            :obj:tuple(:obj:`Summary`, :obj:`dict`): The updated summary and its
+            warnings.
+        """
+
+        # Update warnings
+        warnings = self._update_warnings(
+            prev_warnings,
+            data.pop('warnings', {})
+        )
+        # Important: keys must match DB columns
+        update_columns = {"status": data["summary_status"],
+                          "warnings": warnings}
+        if data["summary_status"] == SummaryStatus.COMPLETED.value:
+            update_columns.update({
+                "ended_at": datetime.now(),
+                "summary": data["output"],
+                "params": data["params"]  # validated params
+            })
+        summary, warnings = self.db.update_summary(id_, **update_columns)
+        self.logger.debug("Consumer message processed. Summary updated: %s",
+                          summary)
+        return summary, warnings
 
     def _produce_message(self,
                          topic: str,
                          message_key: int,
-                         message_value: str):
+                         message_value: bytes):
         """Produce Kafka message.
 
         If the local producer queue is full, the request will be
         aborted.
 
+        This method does not wait for the message to be delivered. The
+        delivery callbacks are served once per consumed batch (see
+        :meth:`_process_batch`).
+
         Args:
             topic (:obj:`str`):
                 The topic to produce the message to.
             message_key (:obj:`int`);
                 The Kafka message key.
-            message_value (:obj:`str`);
+            message_value (:obj:`bytes`);
                 The Kafka message value.
         """
 
@@ -220,10 +428,6 @@ class ConsumerLoop(StoppableThread):
                          f"messages awaiting delivery)")
             self.logger.error(error_msg)
 
-        # Wait up to 1 second for events. Callbacks will
-        # be invoked during this method call.
-        self.producer.poll(1)
-
     @classmethod
     def _update_warnings(cls, prev_warnings: dict, new_warnings: dict):
         """Add new warnings to the existent ones.
@@ -251,20 +455,16 @@ class ConsumerLoop(StoppableThread):
             :obj:`None` or empty, :obj:`None` will be returned.
         """
 
-        if new_warnings is None or not new_warnings:
+        if not new_warnings:
             return prev_warnings
 
-        old_warnings = prev_warnings.copy() if prev_warnings is not None else {}
-        warnings = old_warnings.copy()
-        # New warnings
-        new_keys = {key: value for key, value in new_warnings.items()
-                    if key not in old_warnings}
-        warnings.update(new_keys)
-        # Concatenate values of common keys (values are lists)
-        common = {common_key: old_warnings[common_key] + new_warnings[common_key]
-                  for common_key in [common_key for common_key in old_warnings
-                                     if common_key in new_warnings]}
-        warnings.update(common)
+        warnings = prev_warnings.copy() if prev_warnings is not None else {}
+        for key, value in new_warnings.items():
+            if key in warnings:
+                # Concatenate values of common keys (values are lists)
+                warnings[key] = warnings[key] + value
+            else:
+                warnings[key] = value
 
         return warnings
 
@@ -286,8 +486,8 @@ class ConsumerLoop(StoppableThread):
         """
 
         if err:
-            self.logger.debug(f'Message delivery failed: {err}')
-        else:
+            self.logger.debug('Message delivery failed: %s', err)
+        elif self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug(f'Message delivered sucessfully: [topic]: '
                               f'"{msg.topic()}", [partition]: "{msg.partition()}"'
                               f', [offset]: {msg.offset()}')
@@ -17,17 +17,24 @@
 
 """Unique key calculation for Kafka messages."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.1'
 
 import hashlib
+import json
+
+# Separates the fields in the hashed input, so that moving characters from
+# one field to the next does not result in the same key
+_FIELD_SEPARATOR = b'\x1f'
 
 
 def get_unique_key(source: str, model: str, params: dict) -> str:
     """Get a unique key for a message.
 
-    This method hashes the string formed by concatenating the
-    :attr:`source`, :attr:`model` and :attr:`param` attributes.
-    SHA-256 algorithm is used.
+    This method hashes the :attr:`source`, :attr:`model` and :attr:`param`
+    attributes. The params are serialized as canonical JSON (sorted keys, no
+    whitespace), so the key does not depend on the order in which they were
+    specified. SHA-256 algorithm is used, since with the SHA extensions of
+    current CPUs it is faster than e.g. BLAKE2.
 
     Args:
         source (:obj:`str`):
@@ -41,6 +48,11 @@ def get_unique_key(source: str, model: str, params: dict) -> str:
         :obj:`str`: The unique, SHA-256 ecrypted key.
     """
 
-    return hashlib.sha256(
-        ("".join([source, model, str(params)])).encode()
-    ).hexdigest()
+    # The fields are fed separately to avoid building a concatenated copy
+    # of the (possibly long) source
+    key = hashlib.sha256(source.encode())
+    key.update(_FIELD_SEPARATOR)
+    key.update(model.encode())
+    key.update(_FIELD_SEPARATOR)
+    key.update(json.dumps(params, sort_keys=True, separators=(',', ':')).encode())
+    return key.hexdigest()
@@ -17,15 +17,16 @@
 
 """Dispatcher REST API v1."""
 
-__version__ = '0.1.10'
+__version__ = '0.1.16'
 
 import os
 import re
 import argparse
 import logging
+import orjson
 from datetime import datetime
 from werkzeug import serving
-from flask import Flask, request
+from flask import Flask, request, make_response
 from flask_restful import Api, Resource, abort
 from flask_cors import CORS
 from confluent_kafka import Message, KafkaError
@@ -35,7 +36,7 @@ from kafka.kafka_consumer import ConsumerLoop
 from kafka.unique_key import get_unique_key
 from data.summary_status import SummaryStatus
 from data.summary_dao_factory import SummaryDAOFactory
-from data.schemas import Summary, PlainTextRequestSchema, ResponseSchema
+from data.schemas import Summary, PlainTextRequestSchema, dump_response
 from data.supported_models import SupportedModel
 from data.supported_languages import SupportedLanguage
 from pathlib import Path
@@ -53,6 +54,21 @@ parser.add_argument('-d', '--debug', action='store_true',
                     help='turn on Python logging and Flask to DEBUG level')
 
 
+def output_json(data, code, headers=None):
+    """Make a JSON response encoded with orjson.
+
+    Replaces Flask-RESTful's default JSON representation, which uses the
+    standard :mod:`json` module. The keys of the validation errors might not
+    be strings (e.g., the index of an invalid item in a list), hence
+    :obj:`orjson.OPT_NON_STR_KEYS`.
+    """
+
+    response = make_response(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS),
+                             code)
+    response.headers.extend(headers or {})
+    return response
+
+
 class DispatcherService:
     """Dispatcher service.
 
@@ -69,6 +85,7 @@ class DispatcherService:
     def __init__(self, log_level):
         self.app = Flask(__name__)
         self.api = Api(self.app)
+        self.api.representations['application/json'] = output_json
 
         self.cors = CORS(self.app, resources={
             # Origins examples: http://jizt.it, https://app.jizt.it, http://jizt.it/hi
@@ -91,6 +108,10 @@ class DispatcherService:
         self.kafka_producer = Producer()
         self.kafka_consumerloop = ConsumerLoop(self.db)
 
+        # Flask-RESTful creates a new resource for every request, so the
+        # schema is created once here and passed to it
+        self.request_schema = PlainTextRequestSchema()
+
         # Endpoints
         self.api.add_resource(
             PlainTextSummary,
@@ -98,7 +119,8 @@ class DispatcherService:
             "/v1/summaries/plain-text/<summary_id>",
             endpoint="plain-text-summarization",
             resource_class_kwargs={'dispatcher_service': self,
-                                   'kafka_producer': self.kafka_producer}
+                                   'kafka_producer': self.kafka_producer,
+                                   'request_schema': self.request_schema}
         )
 
         self.api.add_resource(
@@ -113,11 +135,16 @@ class DispatcherService:
     def run(self):
         try:
             self.kafka_consumerloop.start()
+            # Each request is handled in its own thread, so the requests
+            # waiting on the database (which hands out a connection per
+            # thread from its pool) do not block each other
             self.app.run(host=FLASK_HOST,
                          port=FLASK_PORT,
-                         debug=(self.logger.level == "DEBUG"))
+                         debug=(self.logger.level == "DEBUG"),
+                         threaded=True)
         finally:
             self.kafka_consumerloop.stop()
+            self.db.close()
 
     def kafka_delivery_callback(self, err: KafkaError, msg: Message):
         """Kafka per-message delivery callback.
@@ -178,8 +205,7 @@ class PlainTextSummary(Resource):
     """Resource for plain-text requests."""
 
     def __init__(self, **kwargs):
-        self.request_schema = PlainTextRequestSchema()
-        self.ok_response_schema = ResponseSchema()
+        self.request_schema = kwargs['request_schema']
         self.dispatcher_service = kwargs['dispatcher_service']
         self.kafka_producer = kwargs['kafka_producer']
 
@@ -258,9 +284,7 @@ class PlainTextSummary(Resource):
                 f'"{message_value[:500]} [...]"'
             )
 
-        response = {"summary": summary, "warnings": warnings}
-        response = self.ok_response_schema.dump(response)
-        return response, 202  # ACCEPTED
+        return dump_response(summary, warnings), 202  # ACCEPTED
 
     def get(self, summary_id):
         """HTTP GET.
@@ -294,9 +318,7 @@ class PlainTextSummary(Resource):
         # this is the raw id. Therefore, we make sure the returned id matches the
         # id requested (raw id).
         summary.id_ = summary_id
-        response = {"summary": summary, "warnings": warnings}
-        response = self.ok_response_schema.dump(response)
-        return response, 200  # OK
+        return dump_response(summary, warnings), 200  # OK
 
     def _validate_post_request_json(self, json):
         """Validate JSON in a POST request body.
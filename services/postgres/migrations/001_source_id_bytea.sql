@@ -0,0 +1,43 @@
+/*
+* Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+*
+* This program is free software: you can redistribute it and/or modify
+* it under the terms of the GNU General Public License as published by
+* the Free Software Foundation, either version 3 of the License, or
+* (at your option) any later version.
+*
+* This program is distributed in the hope that it will be useful,
+* but WITHOUT ANY WARRANTY; without even the implied warranty of
+* MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+* GNU General Public License for more details.
+*
+* You should have received a copy of the GNU General Public License
+* along with this program.  If not, see <https://www.gnu.org/licenses/>.
+*
+* For license information on the libraries used, see LICENSE.
+*/
+
+
+/*
+* Migrate the source ids from the hex representation of their SHA-256
+* digest (CHAR(64)) to the raw digest (BYTEA), as in schemas.sql.
+*
+* Only needed for databases created with the previous schemas.sql. The
+* DispatcherService must be stopped while it runs, since the new version
+* looks the sources up by their raw digest.
+*/
+BEGIN;
+
+-- The foreign key cannot be kept while the types of both columns change
+ALTER TABLE summary DROP CONSTRAINT FK_source_id;
+
+ALTER TABLE source
+    ALTER COLUMN source_id TYPE BYTEA USING decode(source_id, 'hex');
+ALTER TABLE summary
+    ALTER COLUMN source_id TYPE BYTEA USING decode(source_id, 'hex');
+
+ALTER TABLE summary ADD CONSTRAINT FK_source_id
+    FOREIGN KEY (source_id)
+    REFERENCES source ON DELETE CASCADE ON UPDATE CASCADE;
+
+COMMIT;
@@ -37,7 +37,9 @@ DROP TABLE IF EXISTS source CASCADE;
 * CREATE TABLES
 */
 CREATE TABLE source (
-    source_id           CHAR(64) PRIMARY KEY,
+    -- Raw SHA-256 digest of the content (32 bytes). Databases created with
+    -- the former hex ids are migrated with migrations/001_source_id_bytea.sql
+    source_id           BYTEA PRIMARY KEY,
     content             TEXT NOT NULL,
     content_length      INTEGER NOT NULL CHECK (content_length > 0)
 );
@@ -84,7 +86,7 @@ CREATE TYPE STATUS AS ENUM ('preprocessing', 'encoding', 'summarizing',
                             'postprocessing', 'completed');
 CREATE TABLE summary (
     summary_id          CHAR(64) PRIMARY KEY,
-    source_id           CHAR(64) NOT NULL
+    source_id           BYTEA NOT NULL
         CONSTRAINT FK_source_id
         REFERENCES source ON DELETE CASCADE ON UPDATE CASCADE,
     summary             TEXT,
@@ -20,23 +20,36 @@
 import os
 import argparse
 import logging
-import pickle
+from queue import Queue, Empty, Full
+from threading import Thread, Event
 from text_encoding import SplitterEncoder
 from kafka.kafka_topics import KafkaTopic
 from kafka.kafka_producer import Producer
 from kafka.kafka_consumer import Consumer
 from confluent_kafka import Message, KafkaError, KafkaException
+from confluent_kafka.serialization import StringDeserializer
 from schemas import (TextEncodingsConsumedMsgSchema,
                      DispatcherProducedMsgSchema,
-                     TextSumarizationProducedMsgSchema)
+                     TextEncodingsMsg)
 from summary_status import SummaryStatus
 from pathlib import Path
 
-__version__ = '0.1.3'
+__version__ = '0.1.15'
 
-TOKENIZER_PATH = (
-    Path(os.environ['MODELS_MOUNT_PATH']) / Path(os.environ['TOKENIZER_PATH'])
-)
+TOKENIZER_PATH = str(Path(os.environ['MODELS_MOUNT_PATH'], os.environ['TOKENIZER_PATH']))
+
+# The messages are consumed in batches, which amortizes the cost of going
+# through librdkafka for each one of them, and the texts of each batch are
+# encoded together.
+CONSUME_NUM_MESSAGES = 64
+CONSUME_TIMEOUT_SECONDS = 1.0
+
+# Maximum number of batches fetched in advance while the current
+# one is being processed.
+PREFETCH_BATCHES = 2
+
+# Maximum seconds the producer waits for delivery events on each poll.
+PRODUCER_POLL_TIMEOUT_SECONDS = 0.1
 
 parser = argparse.ArgumentParser(description='Text encoder service. '
                                              'Default log level is WARNING.')
@@ -59,70 +72,197 @@ class TextEncoderService:
         self.logger = logging.getLogger("TextEncoder")
 
         self.logger.debug("Loading t5-large tokenizer...")
-        self.text_encoder = SplitterEncoder(TOKENIZER_PATH, debug=True)  # TODO: change debug to False
+        self.text_encoder = SplitterEncoder(TOKENIZER_PATH)
         self.logger.debug("Tokenizer loaded!")
 
         self.producer = Producer()
         self.consumer = Consumer()
+        self.string_deserializer = StringDeserializer('utf_8')
+        self._stop_event = Event()
         self.consumed_msg_schema = TextEncodingsConsumedMsgSchema()
         self.disp_produced_msg_schema = DispatcherProducedMsgSchema()
-        self.summ_produced_msg_schema = TextSumarizationProducedMsgSchema()
+        self.summ_produced_msg_schema = TextEncodingsMsg()
 
     def run(self):
+        fetcher = poller = None
         try:
             topics_to_subscribe = [KafkaTopic.TEXT_ENCODING.value]
             self.consumer.subscribe(topics_to_subscribe)
             self.logger.debug(f'Consumer subscribed to topic(s): '
                               f'{topics_to_subscribe}')
-
-            while True:
-                msg = self.consumer.poll(timeout=1.0)
-                if msg is None:
+            # The next batches are fetched in another thread while the
+            # current one is processed
+            batches = Queue(maxsize=PREFETCH_BATCHES)
+            fetcher = Thread(target=self._fetch_batches, args=(batches,))
+            fetcher.start()
+            # The delivery callbacks are served in their own thread, so
+            # that producing a message never blocks the processing
+            poller = Thread(target=self._poll_producer)
+            poller.start()
+            # Once stopped, the already fetched batches are still processed
+            while not (self._stop_event.is_set() and batches.empty()):
+                try:
+                    msgs = batches.get(timeout=1.0)
+                except Empty:
                     continue
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
-                        # End of partition event
-                        self.logger.error(f'{msg.topic()} in partition {msg.partition} '
-                                          f'{msg.partition()} reached end at offset '
-                                          f'{msg.offset()}')
-                    elif msg.error():
-                        self.logger.error(f"Error in consumer loop: {msg.error()}")
-                        raise KafkaException(msg.error())
-                else:
-                    self.logger.debug(f'Message consumed: [key]: {msg.key()}, '
-                                      f'[value]: "{msg.value()[:500]} [...]"')
-
-                    update_status = {"summary_status": SummaryStatus.ENCODING.value}
-                    self._produce_message(
-                        KafkaTopic.DISPATCHER.value,
-                        msg.key(),
-                        self.disp_produced_msg_schema.dumps(update_status)
-                    )
-
-                    data = self.consumed_msg_schema.loads(msg.value())
-                    # In the future, when more models are supported, we have
-                    # to produce to the proper model Topic
-                    data.pop('model')  # figure out what topic to produce to
-                    topic = KafkaTopic.TEXT_SUMMARIZATION.value
-
-                    text_preprocessed = data.pop('text_preprocessed')
-                    encoded_text = self.text_encoder.encode(text_preprocessed)
-                    serialized_encoded_text = pickle.dumps(encoded_text)  # bytes type
-                    data['text_encodings'] = serialized_encoded_text
-                    message_value = self.summ_produced_msg_schema.dumps(data)
-                    self._produce_message(
-                        topic,
-                        msg.key(),
-                        message_value
-                    )
-                    self.logger.debug(
-                        f'Message produced: [topic]: "{topic}", '
-                        f'[key]: {msg.key()}, [value]: '
-                        f'"{message_value[:500]} [...]"'
-                    )
+                batch = []
+                for msg in msgs:
+                    if msg.error():
+                        if msg.error().code() == KafkaError._PARTITION_EOF:
+                            # End of partition event
+                            self.logger.error(f'{msg.topic()} in partition {msg.partition} '
+                                              f'{msg.partition()} reached end at offset '
+                                              f'{msg.offset()}')
+                        elif msg.error():
+                            self.logger.error(f"Error in consumer loop: {msg.error()}")
+                            raise KafkaException(msg.error())
+                    else:
+                        msg.set_key(self.string_deserializer(msg.key(), None))
+                        # The value is kept as bytes, which orjson parses directly
+                        batch.append(msg)
+                if batch:
+                    self._process_batch(batch)
+                    for msg in batch:
+                        self.consumer.store_offsets(message=msg)
         finally:
+            # The threads have to be stopped as well if anything failed
+            self._stop_event.set()
+            if fetcher is not None:
+                fetcher.join()
+            if poller is not None:
+                poller.join()
             self.logger.debug("Consumer loop stopped. Closing consumer...")
             self.consumer.close()  # close down consumer to commit final offsets
+            self.producer.flush(timeout=5.0)  # deliver the pending messages
+
+    def _fetch_batches(self, batches: Queue):
+        """Fetch batches of messages until the service is stopped.
+
+        Args:
+            batches (:obj:`queue.Queue`):
+                The queue in which the fetched batches are put.
+        """
+
+        try:
+            while not self._stop_event.is_set():
+                msgs = self.consumer.consume(num_messages=CONSUME_NUM_MESSAGES,
+                                             timeout=CONSUME_TIMEOUT_SECONDS)
+                if not msgs:
+                    continue
+                while not self._stop_event.is_set():
+                    try:
+                        batches.put(msgs, timeout=1.0)
+                        break
+                    except Full:
+                        continue
+        except Exception as error:
+            self.logger.error(f"Error fetching messages: {error}")
+            self._stop_event.set()
+
+    def _poll_producer(self):
+        """Serve the producer delivery callbacks until the service is stopped."""
+
+        while not self._stop_event.is_set():
+            self.producer.poll(PRODUCER_POLL_TIMEOUT_SECONDS)
+
+    def _process_batch(self, msgs: list):
+        """Process a batch of consumed messages.
+
+        The texts of all the messages are encoded at once (see
+        :meth:`SplitterEncoder.encode_batch`). If that fails, they are encoded
+        one by one, and the messages that are invalid or whose text cannot be
+        encoded are logged and skipped. The dispatcher is only
+        notified that the texts are being encoded if the client asked
+        for it (see the field ``stream_status``).
+
+        Args:
+            msgs (:obj:`list`):
+                The consumed messages (:obj:`confluent_kafka.Message`), with
+                their keys already deserialized.
+        """
+
+        update_status = self.disp_produced_msg_schema.dumps(
+            {"summary_status": SummaryStatus.ENCODING.value}
+        )
+        # The debug messages are only built if they are going to be logged
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        keys, datas, texts = [], [], []
+        for msg in msgs:
+            # Each call to key() or value() builds a new Python object
+            key = msg.key()
+            value = msg.value()
+            if debug:
+                self.logger.debug(f'Message consumed: [key]: {key}, '
+                                  f'[value]: "{value[:500]} [...]"')
+
+            # An invalid message is skipped, so that it does not stop the
+            # service and the rest of the batch. Its offset is still stored.
+            try:
+                data = self.consumed_msg_schema.loads(value)
+                text = data.pop('text_preprocessed')
+            except Exception as error:
+                self.logger.error(f'Invalid message, skipping it: [key]: {key}, '
+                                  f'[error]: {error}')
+                continue
+            if data.get('stream_status', False):
+                self._produce_message(
+                    KafkaTopic.DISPATCHER.value,
+                    key,
+                    update_status
+                )
+            # In the future, when more models are supported, we have
+            # to produce to the proper model Topic
+            data.pop('model')  # figure out what topic to produce to
+            keys.append(key)
+            texts.append(text)
+            datas.append(data)
+
+        topic = KafkaTopic.TEXT_SUMMARIZATION.value
+        try:
+            encoded_texts = self.text_encoder.encode_batch(texts)
+        except Exception as error:
+            # A single text that cannot be encoded makes the whole batch
+            # fail, so the texts are encoded one by one instead
+            self.logger.warning(f'Error encoding batch, encoding its texts '
+                                f'one by one: {error}')
+            encoded_texts = [self._encode(key, text)
+                             for key, text in zip(keys, texts)]
+        for key, data, encoded_text in zip(keys, datas, encoded_texts):
+            if encoded_text is None:
+                continue
+            data['text_encodings'] = encoded_text
+            message_value = self.summ_produced_msg_schema.dumps(data)
+            self._produce_message(
+                topic,
+                key,
+                message_value
+            )
+            if debug:
+                self.logger.debug(
+                    f'Message produced: [topic]: "{topic}", '
+                    f'[key]: {key}, [value]: {len(message_value)} bytes'
+                )
+
+    def _encode(self, key: str, text: str):
+        """Encode a single text.
+
+        Args:
+            key (:obj:`str`):
+                The Kafka message key, used to identify the text in the logs.
+            text (:obj:`str`):
+                The text to encode.
+
+        Returns:
+            The encoded text (see :meth:`SplitterEncoder.encode`), or
+            :obj:`None` if it could not be encoded.
+        """
+
+        try:
+            return self.text_encoder.encode(text)
+        except Exception as error:
+            self.logger.error(f'Error encoding text, skipping it: [key]: {key}, '
+                              f'[error]: {error}')
+            return None
 
     def _produce_message(self,
                          topic: str,
@@ -131,7 +271,8 @@ class TextEncoderService:
         """Produce Kafka message.
 
         If the local producer queue is full, the request will be
-        aborted.
+        aborted. The delivery callbacks are served by the thread
+        running :meth:`_poll_producer`.
 
         Args:
             topic (:obj:`str`):
@@ -155,10 +296,6 @@ class TextEncoderService:
             self.logger.error(error_msg)
             raise Exception(error_msg) from err
 
-        # Wait up to 1 second for events. Callbacks will
-        # be invoked during this method call.
-        self.producer.poll(1)
-
     def _kafka_delivery_callback(self, err: KafkaError, msg: Message):
         """Kafka per-message delivery callback.
 
@@ -177,8 +314,8 @@ class TextEncoderService:
         """
 
         if err:
-            self.logger.debug(f'Message delivery failed: {err}')
-        else:
+            self.logger.debug('Message delivery failed: %s', err)
+        elif self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug(f'Message delivered sucessfully: [topic]: '
                               f'"{msg.topic()}", [partition]: "{msg.partition()}"'
                               f', [offset]: {msg.offset()}')
@@ -17,12 +17,12 @@
 
 """Text encoding class with support for ``t5-large`` Hugging Face pretrained model."""
 
-__version__ = '0.0.4'
+__version__ = '0.0.6'
 
 import logging
 import torch
 from utils.tokenization import sentence_tokenize
-from transformers import T5Tokenizer, tokenization_utils_base
+from transformers import T5TokenizerFast, tokenization_utils_base
 from typing import List, Tuple, Optional, Union
 
 
@@ -43,7 +43,8 @@ class SplitterEncoder:
     """
 
     def __init__(self, tokenizer_path: str, debug: bool = False):
-        self._tokenizer = T5Tokenizer.from_pretrained(tokenizer_path)
+        # The Rust-backed tokenizer is much faster than the Python one
+        self._tokenizer = T5TokenizerFast.from_pretrained(tokenizer_path)
         if not debug:
             # deactivate warnings from the tokenizer
             logging.getLogger("transformers.tokenization_utils_base").setLevel(logging.ERROR)
@@ -115,6 +116,38 @@ class SplitterEncoder:
         for further information.
         """
 
+        return self.encode_batch([text],
+                                 prefix=prefix,
+                                 truncation=truncation,
+                                 max_length=max_length,
+                                 return_tensors=return_tensors)[0]
+
+    def encode_batch(
+        self,
+        texts: List[str],
+        prefix: Optional[str] = 'summarize: ',
+        truncation: Optional[Union[bool, str, tokenization_utils_base.TruncationStrategy]] = False,
+        max_length: Optional[int] = None,
+        return_tensors: Optional[str] = 'pt'
+    ) -> List[Union[List[int], torch.LongTensor]]:
+        """Encode several texts at once.
+
+        The sentences of all the texts are tokenized with a single call to
+        the tokenizer, which, unlike encoding them one by one, lets the
+        tokenizer process them in parallel. The texts are then split as
+        in :meth:`encode`.
+
+        Args:
+            texts (:obj:`List[str]`):
+                The texts to be tokenized.
+            prefix, truncation, max_length, return_tensors:
+                See :meth:`encode`.
+
+        Returns:
+            :obj:`List`: The split tokenized ids of each of the texts, in the
+            same order (see :meth:`encode`).
+        """
+
         if return_tensors is not None and return_tensors not in ('pt'):
             raise NotImplementedError(f'{return_tensors} '
                                       f'tensors are currently not supported.')
@@ -122,33 +155,46 @@ class SplitterEncoder:
         # If prefix is None, take the empty string
         prefix = "" if prefix is None else prefix
 
-        sentences = sentence_tokenize(text)
-        # Tokens of each sentence. We remove the last token (EOS token).
-        sent_tks = [self.tokenizer.encode(sent,
-                                          return_tensors=return_tensors)[0][:-1]
-                    for sent in sentences]
-        # Number of tokens of each sentence
-        sent2ntks = [len(sent) for sent in sent_tks]
+        texts_sentences = [sentence_tokenize(text) for text in texts]
+        # The sentences of all the texts, preceded by the prefix. The EOS
+        # token, which T5 adds at the end of each sequence, is not included.
+        all_sentences = [prefix]
+        for sentences in texts_sentences:
+            all_sentences.extend(sentences)
+        all_tks = self.tokenizer(all_sentences,
+                                 add_special_tokens=False)['input_ids']
         # Tokens of the prefix
-        prefix_tks = self.tokenizer.encode(prefix,
-                                           return_tensors=return_tensors)[0][:-1]
+        prefix_tks = all_tks[0]
         # Number of tokens of the prefix
         ntks_prefix = len(prefix_tks)
-
-        split_points, subdiv2ntks = self._divide_eagerly(sent2ntks,
-                                                         ntks_prefix)
-
-        split_points, subdiv2ntks = self._balance_subdivisions(split_points,
-                                                               subdiv2ntks,
-                                                               sent2ntks)
-
-        encoded_subdivs = [torch.cat(
-                               [prefix_tks]
-                               + sent_tks[split_points[i]:split_points[i+1]]
-                               + [torch.tensor([self.tokenizer.eos_token_id])]
-                           ).unsqueeze(0) for i in range(len(split_points) - 1)]
-
-        return encoded_subdivs
+        eos_tks = [self.tokenizer.eos_token_id]
+
+        encoded_texts = []
+        first_sent = 1
+        for sentences in texts_sentences:
+            # Tokens of each sentence of the text
+            sent_tks = all_tks[first_sent:first_sent + len(sentences)]
+            first_sent += len(sentences)
+            # Number of tokens of each sentence
+            sent2ntks = [len(sent) for sent in sent_tks]
+
+            split_points, subdiv2ntks = self._divide_eagerly(sent2ntks,
+                                                             ntks_prefix)
+
+            split_points, subdiv2ntks = self._balance_subdivisions(split_points,
+                                                                   subdiv2ntks,
+                                                                   sent2ntks)
+
+            encoded_subdivs = []
+            for i in range(len(split_points) - 1):
+                subdiv_tks = prefix_tks[:]
+                for tks in sent_tks[split_points[i]:split_points[i+1]]:
+                    subdiv_tks.extend(tks)
+                subdiv_tks.extend(eos_tks)
+                encoded_subdivs.append(torch.tensor([subdiv_tks]))
+            encoded_texts.append(encoded_subdivs)
+
+        return encoded_texts
 
     def _divide_eagerly(self,
                         sent2ntks: List[int],
@@ -17,23 +17,27 @@
 
 """Kafka Consumer."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.3'
 
 import socket
-from confluent_kafka import DeserializingConsumer
-from confluent_kafka.serialization import StringDeserializer
+import confluent_kafka
 
 
 class Consumer:
-    """Wrapper class around :obj:`confluent_kafka.DeserializingConsumer`.
+    """Wrapper class around :obj:`confluent_kafka.Consumer`.
 
     It includes the specific consumer configuration. When
     a :obj:`Consumer` is instanciated, it will return
-    a :obj:`confluent_kafka.DeserializingConsumer`.
+    a :obj:`confluent_kafka.Consumer`.
+
+    The :obj:`confluent_kafka.DeserializingConsumer` does not implement
+    :meth:`consume`, so the messages are consumed in batches with a
+    plain :obj:`confluent_kafka.Consumer`, and their keys and values
+    have to be deserialized by the caller.
 
     For more information, see the official Confluent Kafka
-    `DeserializingConsumer documentation
-    <https://docs.confluent.io/platform/current/clients/confluent-kafka-python/#deserializingconsumer>`__.
+    `Consumer documentation
+    <https://docs.confluent.io/platform/current/clients/confluent-kafka-python/#consumer>`__.
     """
 
     def __new__(cls):
@@ -43,8 +47,15 @@ class Consumer:
                   'group.id': "text-summarizer",
                   'auto.offset.reset': "earliest",
                   'session.timeout.ms': 10000,
+                  # Favour larger fetches, since the messages contain texts
+                  # or their encodings
+                  'fetch.min.bytes': 1024 * 1024,
+                  'fetch.wait.max.ms': 100,
+                  'max.partition.fetch.bytes': 5 * 1024 * 1024,
+                  'queued.max.messages.kbytes': 65536,
                   'enable.auto.commit': True,  # default
                   'auto.commit.interval.ms': 5000,  # default
-                  'key.deserializer': StringDeserializer('utf_8'),
-                  'value.deserializer': StringDeserializer('utf_8')}
-        return DeserializingConsumer(config)
+                  # Batches are fetched in advance, so offsets are only stored
+                  # (and then auto-committed) once their messages are processed
+                  'enable.auto.offset.store': False}
+        return confluent_kafka.Consumer(config)
@@ -17,7 +17,7 @@
 
 """Kafka Producer."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.2'
 
 import socket
 from confluent_kafka import SerializingProducer
@@ -40,6 +40,13 @@ class Producer:
         # Producer configuration. Must match Stimzi/Kafka configuration.
         config = {'bootstrap.servers': "jizt-cluster-kafka-bootstrap:9092",
                   'client.id': socket.gethostname(),
-                  'key.serializer': StringSerializer('utf_8'),
-                  'value.serializer': StringSerializer('utf_8')}
+                  # lz4 is cheap in CPU, which these services spend on the
+                  # model. Waiting a bit lets librdkafka batch (and compress)
+                  # several messages together.
+                  'compression.type': "lz4",
+                  'linger.ms': 50,
+                  'batch.size': 65536,
+                  'key.serializer': StringSerializer('utf_8')}
+        # No value serializer is set, since the values are already serialized
+        # to bytes by orjson (see OrjsonSchema)
         return SerializingProducer(config)
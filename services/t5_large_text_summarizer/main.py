@@ -17,31 +17,42 @@
 
 """Text Summarizer."""
 
-__version__ = '0.1.5'
+__version__ = '0.1.13'
 
 import os
 import argparse
 import logging
-import pickle
+from queue import Queue, Empty, Full
+from threading import Thread, Event
 from text_summarization import Summarizer
 from kafka.kafka_topics import KafkaTopic
 from kafka.kafka_producer import Producer
 from kafka.kafka_consumer import Consumer
 from confluent_kafka import Message, KafkaError, KafkaException
-from schemas import (TextSummarizationConsumedMsgSchema,
+from confluent_kafka.serialization import StringDeserializer
+from schemas import (TextEncodingsMsg,
                      DispatcherProducedMsgSchema,
                      TextPostprocessingProducedMsgSchema)
 from utils.param_validation import validate_params
 from utils.summary_status import SummaryStatus
 from pathlib import Path
 
-TOKENIZER_PATH = (
-    Path(os.environ['MODELS_MOUNT_PATH']) / Path(os.environ['TOKENIZER_PATH'])
-)
+TOKENIZER_PATH = str(Path(os.environ['MODELS_MOUNT_PATH'], os.environ['TOKENIZER_PATH']))
 
-MODEL_PATH = (
-    Path(os.environ['MODELS_MOUNT_PATH']) / Path(os.environ['MODEL_PATH'])
-)
+MODEL_PATH = str(Path(os.environ['MODELS_MOUNT_PATH'], os.environ['MODEL_PATH']))
+
+# The messages are consumed in batches, which amortizes the cost of going
+# through librdkafka for each one of them. The batches are kept small, since
+# their messages are still processed one at a time.
+CONSUME_NUM_MESSAGES = 64
+CONSUME_TIMEOUT_SECONDS = 1.0
+
+# Maximum number of batches fetched in advance while the current
+# one is being processed.
+PREFETCH_BATCHES = 2
+
+# Maximum seconds the producer waits for delivery events on each poll.
+PRODUCER_POLL_TIMEOUT_SECONDS = 0.1
 
 parser = argparse.ArgumentParser(description='Text summarizer service. '
                                              'Default log level is WARNING.')
@@ -69,73 +80,155 @@ class TextSummarizerService:
 
         self.producer = Producer()
         self.consumer = Consumer()
-        self.consumed_msg_schema = TextSummarizationConsumedMsgSchema()
+        self.string_deserializer = StringDeserializer('utf_8')
+        self._stop_event = Event()
+        self.consumed_msg_schema = TextEncodingsMsg()
         self.disp_produced_msg_schema = DispatcherProducedMsgSchema()
         self.post_produced_msg_schema = TextPostprocessingProducedMsgSchema()
 
     def run(self):
+        fetcher = poller = None
         try:
             topics_to_subscribe = [KafkaTopic.TEXT_SUMMARIZATION.value]
             self.consumer.subscribe(topics_to_subscribe)
             self.logger.debug(f'Consumer subscribed to topic(s): '
                               f'{topics_to_subscribe}')
-
-            while True:
-                msg = self.consumer.poll(timeout=1.0)
-                if msg is None:
+            # The next batches are fetched in another thread while the
+            # current one is processed
+            batches = Queue(maxsize=PREFETCH_BATCHES)
+            fetcher = Thread(target=self._fetch_batches, args=(batches,))
+            fetcher.start()
+            # The delivery callbacks are served in their own thread, so
+            # that producing a message never blocks the processing
+            poller = Thread(target=self._poll_producer)
+            poller.start()
+            # Once stopped, the already fetched batches are still processed
+            while not (self._stop_event.is_set() and batches.empty()):
+                try:
+                    msgs = batches.get(timeout=1.0)
+                except Empty:
                     continue
-                if msg.error():
-                    if msg.error().code() == KafkaError._PARTITION_EOF:
-                        # End of partition event
-                        self.logger.error(f'{msg.topic()} in partition {msg.partition} '
-                                          f'{msg.partition()} reached end at offset '
-                                          f'{msg.offset()}')
-                    elif msg.error():
-                        self.logger.error(f"Error in consumer loop: {msg.error()}")
-                        raise KafkaException(msg.error())
-                else:
-                    self.logger.debug(f'Message consumed: [key]: {msg.key()}, '
-                                      f'[value]: "{msg.value()[:500]} [...]"')
-
-                    update_status = {"summary_status": SummaryStatus.SUMMARIZING.value}
-                    self._produce_message(
-                        KafkaTopic.DISPATCHER.value,
-                        msg.key(),
-                        self.disp_produced_msg_schema.dumps(update_status)
-                    )
-
-                    data = self.consumed_msg_schema.loads(msg.value())
-                    topic = KafkaTopic.TEXT_POSTPROCESSING.value
-                    serialized_encoded_text = data.pop('text_encodings')
-                    encoded_text = pickle.loads(serialized_encoded_text)
-
-                    params, invalid_params, warnings = validate_params(data['params'])
-                    update_status['warnings'] = warnings
-                    self._produce_message(
-                        KafkaTopic.DISPATCHER.value,
-                        msg.key(),
-                        self.disp_produced_msg_schema.dumps(update_status)
-                    )
-                    self.logger.debug(f"Valid params: {params}")
-                    self.logger.debug(f"Invalid params: {invalid_params}")
-                    self.logger.debug(f"Warnings: {warnings}")
-                    data['params'] = params  # update params to keep only the valid ones
-                    summarized_text = self.summarizer.summarize(encoded_text, **params)
-                    data['summary'] = summarized_text
-                    message_value = self.post_produced_msg_schema.dumps(data)
-                    self._produce_message(
-                        topic,
-                        msg.key(),
-                        message_value
-                    )
-                    self.logger.debug(
-                        f'Message produced: [topic]: "{topic}", '
-                        f'[key]: {msg.key()}, [value]: '
-                        f'"{message_value[:500]} [...]'
-                    )
+                batch = []
+                for msg in msgs:
+                    if msg.error():
+                        if msg.error().code() == KafkaError._PARTITION_EOF:
+                            # End of partition event
+                            self.logger.error(f'{msg.topic()} in partition {msg.partition} '
+                                              f'{msg.partition()} reached end at offset '
+                                              f'{msg.offset()}')
+                        elif msg.error():
+                            self.logger.error(f"Error in consumer loop: {msg.error()}")
+                            raise KafkaException(msg.error())
+                    else:
+                        msg.set_key(self.string_deserializer(msg.key(), None))
+                        # The value is kept as bytes (see TextEncodingsMsg)
+                        batch.append(msg)
+                for msg in batch:
+                    self._process_message(msg)
+                    self.consumer.store_offsets(message=msg)
         finally:
+            # The threads have to be stopped as well if anything failed
+            self._stop_event.set()
+            if fetcher is not None:
+                fetcher.join()
+            if poller is not None:
+                poller.join()
             self.logger.debug("Consumer loop stopped. Closing consumer...")
             self.consumer.close()  # close down consumer to commit final offsets
+            self.producer.flush(timeout=5.0)  # deliver the pending messages
+
+    def _fetch_batches(self, batches: Queue):
+        """Fetch batches of messages until the service is stopped.
+
+        Args:
+            batches (:obj:`queue.Queue`):
+                The queue in which the fetched batches are put.
+        """
+
+        try:
+            while not self._stop_event.is_set():
+                msgs = self.consumer.consume(num_messages=CONSUME_NUM_MESSAGES,
+                                             timeout=CONSUME_TIMEOUT_SECONDS)
+                if not msgs:
+                    continue
+                while not self._stop_event.is_set():
+                    try:
+                        batches.put(msgs, timeout=1.0)
+                        break
+                    except Full:
+                        continue
+        except Exception as error:
+            self.logger.error(f"Error fetching messages: {error}")
+            self._stop_event.set()
+
+    def _poll_producer(self):
+        """Serve the producer delivery callbacks until the service is stopped."""
+
+        while not self._stop_event.is_set():
+            self.producer.poll(PRODUCER_POLL_TIMEOUT_SECONDS)
+
+    def _process_message(self, msg: Message):
+        """Process a consumed message.
+
+        The dispatcher is always sent the warnings derived from the params,
+        but it is only notified before that the text is being summarized if
+        the client asked for it (see the field ``stream_status``).
+
+        Args:
+            msg (:obj:`confluent_kafka.Message`):
+                The consumed message, with its key and value already
+                deserialized.
+        """
+
+        # Each call to key() or value() builds a new Python object
+        key = msg.key()
+        value = msg.value()
+        # The debug messages are only built if they are going to be logged
+        debug = self.logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            self.logger.debug(f'Message consumed: [key]: {key}, '
+                              f'[value]: {len(value)} bytes')
+
+        data = self.consumed_msg_schema.loads(value)
+        stream_status = data.pop('stream_status', False)
+
+        update_status = {"summary_status": SummaryStatus.SUMMARIZING.value}
+        if stream_status:
+            self._produce_message(
+                KafkaTopic.DISPATCHER.value,
+                key,
+                self.disp_produced_msg_schema.dumps(update_status)
+            )
+
+        topic = KafkaTopic.TEXT_POSTPROCESSING.value
+        encoded_text = data.pop('text_encodings')
+
+        params, invalid_params, warnings = validate_params(data['params'])
+        update_status['warnings'] = warnings
+        self._produce_message(
+            KafkaTopic.DISPATCHER.value,
+            key,
+            self.disp_produced_msg_schema.dumps(update_status)
+        )
+        if debug:
+            self.logger.debug(f"Valid params: {params}")
+            self.logger.debug(f"Invalid params: {invalid_params}")
+            self.logger.debug(f"Warnings: {warnings}")
+        data['params'] = params  # update params to keep only the valid ones
+        summarized_text = self.summarizer.summarize(encoded_text, **params)
+        data['summary'] = summarized_text
+        message_value = self.post_produced_msg_schema.dumps(data)
+        self._produce_message(
+            topic,
+            key,
+            message_value
+        )
+        if debug:
+            self.logger.debug(
+                f'Message produced: [topic]: "{topic}", '
+                f'[key]: {key}, [value]: '
+                f'"{message_value[:500]} [...]'
+            )
 
     def _produce_message(self,
                          topic: str,
@@ -144,7 +237,8 @@ class TextSummarizerService:
         """Produce Kafka message.
 
         If the local producer queue is full, the request will be
-        aborted.
+        aborted. The delivery callbacks are served by the thread
+        running :meth:`_poll_producer`.
 
         Args:
             topic (:obj:`str`):
@@ -168,10 +262,6 @@ class TextSummarizerService:
             self.logger.error(error_msg)
             raise Exception(error_msg) from err
 
-        # Wait up to 1 second for events. Callbacks will
-        # be invoked during this method call.
-        self.producer.poll(1)
-
     def _kafka_delivery_callback(self, err: KafkaError, msg: Message):
         """Kafka per-message delivery callback.
 
@@ -190,8 +280,8 @@ class TextSummarizerService:
         """
 
         if err:
-            self.logger.debug(f'Message delivery failed: {err}')
-        else:
+            self.logger.debug('Message delivery failed: %s', err)
+        elif self.logger.isEnabledFor(logging.DEBUG):
             self.logger.debug(f'Message delivered sucessfully: [topic]: '
                               f'"{msg.topic()}", [partition]: "{msg.partition()}"'
                               f', [offset]: {msg.offset()}')
@@ -17,58 +17,102 @@
 
 """Marshmallow Schemas for TextSummarizerService."""
 
-import base64
+import struct
+import orjson
+import numpy as np
+import torch
 from marshmallow import Schema, fields
 
-__version__ = '0.1.6'
+__version__ = '0.1.9'
 
 
-class JSONSerializableBytesField(fields.Field):
-    """A JSON serializable :obj:`bytes` field.
+class OrjsonSchema(Schema):
+    """Base schema that (de)serializes with :mod:`orjson` instead of :mod:`json`.
 
-    For more info, see the
-    `Marshmallow docs <https://marshmallow.readthedocs.io/en/stable/marshmallow.fields.html>`__.
+    orjson is much faster. Its ``dumps()`` returns :obj:`bytes`, which the
+    producer sends as they are.
     """
 
-    def _serialize(self, value, attr, obj, **kwargs):
-        """Serialize :obj:`bytes` to :obj:`string`.
+    class Meta:
+        render_module = orjson
 
-        For more info, see base class.
-        """
-
-        if value is None:
-            return None
-        b64_encoded = base64.b64encode(value)
-        return b64_encoded.decode('utf-8')
 
-    def _deserialize(self, value, attr, data, **kwargs):
-        """Deserialize :obj:`bytes` from :obj:`str`.
+class TextEncodingsMsg:
+    """Binary format of the messages of the topic :attr:`KafkaTopic.TEXT_SUMMARIZATION`.
 
-        For more info, see base class.
-        """
+    The encodings are sent as raw token ids instead of going through pickle
+    and base64, which inflates them by a third. A message is laid out as:
 
-        if isinstance(value, str):
-            b64_encoded_str = value.encode('utf-8')
-            return base64.decodebytes(b64_encoded_str)
-        raise super(JSONSerializableBytesField,
-                    self).make_error('Value must be a string.')
+    * A header with the length of the metadata (``uint32``), the number of
+      subdivisions (``uint32``) and the number of tokens of each of them
+      (``uint32`` each).
+    * The metadata, i.e., the rest of the fields, as UTF-8 encoded JSON.
+    * The token ids of all the subdivisions, as ``int32``.
 
-
-class TextSummarizationConsumedMsgSchema(Schema):
-    """Schema for the consumed messages from the topic :attr:`KafkaTopic.TEXT_SUMMARIZATION`.
+    All the numbers are little-endian.
 
     Fields:
-        text_encodings (:obj:`JSONSerializableBytesField`):
-            The encoded text to be summarized.
+        text_encodings (:obj:`List[torch.LongTensor]`):
+            The encoded text, split into subdivisions of shape ``(1, n)``.
         params (:obj:`dict`):
             The params used in the summary generation.
+        stream_status (:obj:`bool`):
+            Whether every stage of the summary generation must be notified.
     """
 
-    text_encodings = JSONSerializableBytesField(required=True)
-    params = fields.Dict(required=True)
+    _UINT32 = struct.Struct('<I')
+    _IDS_DTYPE = np.dtype('<i4')
 
+    def dumps(self, data: dict) -> bytes:
+        """Serialize a message.
+
+        Args:
+            data (:obj:`dict`):
+                The message fields.
+
+        Returns:
+            :obj:`bytes`: The serialized message.
+        """
+
+        encodings = data['text_encodings']
+        metadata = orjson.dumps({key: value for key, value in data.items()
+                                 if key != 'text_encodings'})
+        header = struct.pack(f'<{2 + len(encodings)}I',
+                             len(metadata),
+                             len(encodings),
+                             *(subdiv.shape[-1] for subdiv in encodings))
+        ids = np.concatenate([subdiv.reshape(-1).numpy()
+                              for subdiv in encodings])
+        return b''.join((header, metadata,
+                         ids.astype(self._IDS_DTYPE, copy=False).tobytes()))
+
+    def loads(self, value: bytes) -> dict:
+        """Deserialize a message.
+
+        Args:
+            value (:obj:`bytes`):
+                The serialized message.
+
+        Returns:
+            :obj:`dict`: The message fields.
+        """
 
-class TextPostprocessingProducedMsgSchema(Schema):
+        metadata_len, n_subdivs = struct.unpack_from('<2I', value)
+        subdivs_ntks = struct.unpack_from(f'<{n_subdivs}I', value,
+                                          2 * self._UINT32.size)
+        offset = (2 + n_subdivs) * self._UINT32.size
+        data = orjson.loads(value[offset:offset + metadata_len])
+        offset += metadata_len
+        ids = np.frombuffer(value, self._IDS_DTYPE, offset=offset)
+        # The model expects int64 token ids (this also copies the read-only
+        # buffer, which torch cannot wrap)
+        ids = torch.from_numpy(ids.astype(np.int64))
+        data['text_encodings'] = [subdiv.unsqueeze(0) for subdiv
+                                  in torch.split(ids, subdivs_ntks)]
+        return data
+
+
+class TextPostprocessingProducedMsgSchema(OrjsonSchema):
     """Schema for the produced messages to the topic :attr:`KafkaTopic.TEXT_POSTPROCESSING`.
 
     Fields:
@@ -82,7 +126,7 @@ class TextPostprocessingProducedMsgSchema(Schema):
     params = fields.Dict(required=True)
 
 
-class DispatcherProducedMsgSchema(Schema):
+class DispatcherProducedMsgSchema(OrjsonSchema):
     """Schema for the produced messages to the topic :attr:`KafkaTopic.DISPATCHER`.
 
     Fields:
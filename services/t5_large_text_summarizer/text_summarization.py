@@ -17,13 +17,19 @@
 
 """Summarization class with support for Hugging Face pretrained models."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.5'
 
 import math
 import torch
-from transformers import T5Tokenizer, T5ForConditionalGeneration
+from torch.nn.utils.rnn import pad_sequence
+from transformers import T5TokenizerFast, T5ForConditionalGeneration
 from typing import List, Optional, Union, Iterable
 
+# Maximum number of subdivisions summarized in a single call to generate. Each
+# subdivision is expanded to num_beams sequences, so the memory used by a call
+# grows with both of them
+MAX_SUBDIVS_PER_GENERATE = 8
+
 
 class Summarizer:
     """T5-large text summarizer.
@@ -42,9 +48,33 @@ class Summarizer:
     <https://huggingface.co/transformers/model_doc/t5.html#transformers.T5ForConditionalGeneration>`__:
     """
 
-    def __init__(self, tokenizer_path: str, model_path: str):
-        self._tokenizer = T5Tokenizer.from_pretrained(tokenizer_path)
+    def __init__(self, tokenizer_path: str, model_path: str, quantize: bool = True):
+        """Load the tokenizer and the model.
+
+        Args:
+            tokenizer_path (:obj:`str`):
+                The path to the pretrained tokenizer.
+            model_path (:obj:`str`):
+                The path to the pretrained model.
+            quantize (:obj:`bool`, `optional`, defaults to :obj:`True`):
+                Whether to apply dynamic int8 quantization to the linear layers
+                of the model, which speeds up the generation on CPU several
+                times and reduces the size of the model in memory, at the cost
+                of a slight loss of precision. Only applied if the model runs
+                on CPU, since quantized layers are not supported on GPU.
+        """
+
+        self._tokenizer = T5TokenizerFast.from_pretrained(tokenizer_path)
         self._model = T5ForConditionalGeneration.from_pretrained(model_path)
+        # The model runs on GPU if there is one available
+        self._device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+        if self._device.type == 'cuda':
+            self._model = self._model.to(self._device)
+        elif quantize:
+            self._model = torch.quantization.quantize_dynamic(
+                self._model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        self._model.eval()
 
     @property
     def tokenizer(self):
@@ -70,7 +100,7 @@ class Summarizer:
         length_penalty: Optional[float] = None,
         no_repeat_ngram_size: Optional[int] = 3,
         num_return_sequences: Optional[int] = None,
-        use_cache: Optional[bool] = None,
+        use_cache: Optional[bool] = True,
         skip_special_tokens: Optional[bool] = True,
         clean_up_tokenization_spaces: Optional[bool] = True
     ) -> str:
@@ -124,7 +154,7 @@ class Summarizer:
                 If set to int > 0, all ngrams of that size can only occur once.
             num_return_sequences(:obj:`int`, `optional`, defaults to 1):
                 The number of independently computed returned sequences for each element in the batch.
-            use_cache: (:obj:`bool`, `optional`, defaults to :obj:`True`):
+            use_cache (:obj:`bool`, `optional`, defaults to :obj:`True`):
                 Whether or not the model should use the past last key/values attentions (if applicable
                 to the model) speed up decoding.
             skip_special_tokens (:obj:`bool`, `optional`, defaults to :obj:`True`):
@@ -136,32 +166,49 @@ class Summarizer:
             :obj:`str`: The generated summary.
         """
 
-        summary_subdivs = []
-        input_ids_total_len = sum([len(ids.squeeze()) for ids in input_ids])
+        # Subdivisions as 1-D tensors
+        input_ids = [ids.reshape(-1) for ids in input_ids]
+        input_ids_total_len = sum([len(ids) for ids in input_ids])
         max_length = input_ids_total_len * relative_max_length
         min_length = input_ids_total_len * relative_min_length
         subdiv_max_length = math.floor(max_length / len(input_ids))
         subdiv_min_length = math.ceil(min_length / len(input_ids))
 
-        for ids_subdiv in input_ids:
-            summary_ids = self._model.generate(input_ids=ids_subdiv,
-                                               max_length=subdiv_max_length,
-                                               min_length=subdiv_min_length,
-                                               do_sample=do_sample,
-                                               early_stopping=early_stopping,
-                                               num_beams=num_beams,
-                                               temperature=temperature,
-                                               top_k=top_k,
-                                               top_p=top_p,
-                                               repetition_penalty=repetition_penalty,
-                                               bad_words_ids=bad_words_ids,
-                                               length_penalty=length_penalty,
-                                               no_repeat_ngram_size=no_repeat_ngram_size,
-                                               num_return_sequences=num_return_sequences,
-                                               use_cache=use_cache)
-            decoded_subdiv = self._tokenizer.decode(summary_ids.squeeze().tolist(),
-                                                    skip_special_tokens=skip_special_tokens,
-                                                    clean_up_tokenization_spaces=clean_up_tokenization_spaces)
-            summary_subdivs.append(decoded_subdiv)
+        # The subdivisions are summarized in chunks of at most
+        # MAX_SUBDIVS_PER_GENERATE, each one padded to the length of its
+        # longest subdivision. The padding is masked out in the attention.
+        summary_subdivs = []
+        for i in range(0, len(input_ids), MAX_SUBDIVS_PER_GENERATE):
+            chunk = input_ids[i:i + MAX_SUBDIVS_PER_GENERATE]
+            batch_input_ids = pad_sequence(chunk, batch_first=True,
+                                           padding_value=self._tokenizer.pad_token_id)
+            attention_mask = pad_sequence([torch.ones_like(ids) for ids in chunk],
+                                          batch_first=True)
+            summary_ids = self._model.generate(
+                input_ids=batch_input_ids.to(self._device, non_blocking=True),
+                attention_mask=attention_mask.to(self._device, non_blocking=True),
+                max_length=subdiv_max_length,
+                min_length=subdiv_min_length,
+                do_sample=do_sample,
+                early_stopping=early_stopping,
+                num_beams=num_beams,
+                temperature=temperature,
+                top_k=top_k,
+                top_p=top_p,
+                repetition_penalty=repetition_penalty,
+                bad_words_ids=bad_words_ids,
+                length_penalty=length_penalty,
+                no_repeat_ngram_size=no_repeat_ngram_size,
+                num_return_sequences=num_return_sequences,
+                use_cache=use_cache
+            )
+            # If several sequences are returned for each subdivision, the first
+            # one is taken
+            summary_ids = summary_ids[::num_return_sequences or 1]
+            summary_subdivs.extend(self._tokenizer.batch_decode(
+                summary_ids,
+                skip_special_tokens=skip_special_tokens,
+                clean_up_tokenization_spaces=clean_up_tokenization_spaces
+            ))
 
         return " ".join(summary_subdivs)
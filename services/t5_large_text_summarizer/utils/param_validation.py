@@ -17,11 +17,15 @@
 
 """Model parameter validation."""
 
-__version__ = '0.1.1'
+__version__ = '0.1.10'
 
 from default_params import DefaultParam
-from warning_messages import ValidationWarning, WarningMessage
-from typing import Union, Any, Tuple, List
+from warning_messages import (ValidationWarning, INVALID_INT, INVALID_FLOAT,
+                              INVALID_BOOL, OUT_OF_LOWER_BOUND, OUT_OF_BOUNDS,
+                              UNSUPPORTED_PARAM, INVALID_MAX_LENGTH,
+                              INVALID_MIN_LENGTH, INVALID_MAX_LENGTH_DEFAULT,
+                              INVALID_MIN_LENGTH_DEFAULT)
+from typing import Any, Tuple, List
 
 # Requirements the different params must comply with
 # The key 'type_' is always required; 'lower_bound' and 'upper_bound' are optional.
@@ -45,6 +49,20 @@ PARAMS_VALIDATION_REQUISITES = {
                                                      'lower_bound': 0}
 }
 
+# The following are derived from the constants above once, instead of on each
+# call to validate_params.
+# Default value of each supported param, e.g., {'num_beams': 4, ...}
+_DEFAULTS = {param.name.lower(): param.value for param in DefaultParam}
+# The type of each param and its bounds, e.g., {'num_beams': (int, 0, None), ...}
+_SPEC = {key: (reqs['type_'], reqs.get('lower_bound'), reqs.get('upper_bound'))
+         for key, reqs in PARAMS_VALIDATION_REQUISITES.items()}
+_MIN_LENGTH = DefaultParam.RELATIVE_MIN_LENGTH.name.lower()
+_MAX_LENGTH = DefaultParam.RELATIVE_MAX_LENGTH.name.lower()
+_MIN_LENGTH_DEFAULT = DefaultParam.RELATIVE_MIN_LENGTH.value
+_MAX_LENGTH_DEFAULT = DefaultParam.RELATIVE_MAX_LENGTH.value
+# Marks the params not included in the request
+_MISSING = object()
+
 
 # Used to generate the warning messages
 WARNING = ValidationWarning()
@@ -54,7 +72,8 @@ def validate_params(params: dict) -> Tuple[dict, dict]:
     """Validate T5 model parameters.
 
     If a parameter contains an invalid value, it will be replaced by a default value.
-    If a parameter does not exist, it is removed.
+    If a parameter does not exist, it is removed. The dictionary passed is not
+    modified.
 
     Args:
         params (:obj:`dict`):
@@ -66,59 +85,61 @@ def validate_params(params: dict) -> Tuple[dict, dict]:
         parameters); the third with the warning messages.
     """
 
-    supported_params = [param.name.lower() for param in DefaultParam]
+    # Most requests don't specify any params
+    if not params:
+        return dict(_DEFAULTS), {}, {}
+
+    valid_params = {}
     invalid_params = {}
     warning_messages = {}
 
-    for key in params:
-        if key not in supported_params:
-            invalid_params[key] = params[key]
-            warning_messages[key] = [WARNING(WarningMessage.UNSUPPORTED)]
+    # Supported params, replacing the invalid and missing ones by their default
+    for key, default_value in _DEFAULTS.items():
+        value = params.get(key, _MISSING)
+        if value is _MISSING:
+            valid_params[key] = default_value
+            continue
+        is_valid, warnings = _validate_value(value, *_SPEC[key])
+        if is_valid:
+            valid_params[key] = value
         else:
-            reqs = PARAMS_VALIDATION_REQUISITES[key].copy()
-            type_ = reqs.pop('type_')
-
-            is_valid, warnings = _validate_value(params[key], type_, **reqs)
-
-            if not is_valid:
-                invalid_params[key] = params[key]
-            if warnings:
-                warning_messages[key] = warnings
-
-    # Ensure that the min length is smaller than the max length
-    min_ = DefaultParam.RELATIVE_MIN_LENGTH.name.lower()
-    max_ = DefaultParam.RELATIVE_MAX_LENGTH.name.lower()
-    # If any of them is invalid, we first add the default value
-    if min_ in invalid_params:
-        params[min_] = DefaultParam[min_.upper()].value
-    if max_ in invalid_params:
-        params[max_] = DefaultParam[max_.upper()].value
-    # Checks
-    if (min_ in params and max_ in params and params[min_] >= params[max_]):
-        invalid_params[min_] = params[min_]
-        invalid_params[max_] = params[max_]
+            valid_params[key] = default_value
+            invalid_params[key] = value
+            warning_messages[key] = warnings
+    # Unsupported params (in the order of the request, so the warnings
+    # are deterministic)
+    for key in [key for key in params if key not in _DEFAULTS]:
+        invalid_params[key] = params[key]
+        warning_messages[key] = [UNSUPPORTED_PARAM]
+
+    # Ensure that the min length is smaller than the max length. The checks
+    # only apply to the lengths specified in the request.
+    min_ = _MIN_LENGTH
+    max_ = _MAX_LENGTH
+    if (min_ in params and max_ in params
+            and valid_params[min_] >= valid_params[max_]):
+        invalid_params[min_] = valid_params[min_]
+        invalid_params[max_] = valid_params[max_]
         if min_ not in warning_messages:
-            warning_messages[min_] = [WARNING(WarningMessage.MIN_LENGTH)]
+            warning_messages[min_] = [INVALID_MIN_LENGTH]
         if max_ not in warning_messages:
-            warning_messages[max_] = [WARNING(WarningMessage.MAX_LENGTH)]
+            warning_messages[max_] = [INVALID_MAX_LENGTH]
+        valid_params[min_] = _MIN_LENGTH_DEFAULT
+        valid_params[max_] = _MAX_LENGTH_DEFAULT
     elif (min_ in params and max_ not in params and
-            params[min_] >= DefaultParam.RELATIVE_MAX_LENGTH.value):
-        invalid_params[min_] = params[min_]
+            valid_params[min_] >= _MAX_LENGTH_DEFAULT):
+        invalid_params[min_] = valid_params[min_]
         if min_ not in warning_messages:
-            warning_messages[min_] = [WARNING(WarningMessage.MIN_LENGTH_DEFAULT)]
+            warning_messages[min_] = [INVALID_MIN_LENGTH_DEFAULT]
+        valid_params[min_] = _MIN_LENGTH_DEFAULT
     elif (min_ not in params and max_ in params and
-            params[max_] <= DefaultParam.RELATIVE_MIN_LENGTH.value):
-        invalid_params[max_] = params[max_]
+            valid_params[max_] <= _MIN_LENGTH_DEFAULT):
+        invalid_params[max_] = valid_params[max_]
         if max_ not in warning_messages:
-            warning_messages[max_] = [WARNING(WarningMessage.MAX_LENGTH_DEFAULT)]
+            warning_messages[max_] = [INVALID_MAX_LENGTH_DEFAULT]
+        valid_params[max_] = _MAX_LENGTH_DEFAULT
 
-    _ = [params.pop(invalid) for invalid in invalid_params]  # remove invalid params
-    for default_param in supported_params:
-        if default_param not in params:  # add not included params
-            params[default_param] = \
-                DefaultParam[default_param.upper()].value
-
-    return params, invalid_params, warning_messages
+    return valid_params, invalid_params, warning_messages
 
 
 def _validate_value(
@@ -151,50 +172,22 @@ def _validate_value(
         any warning messages, the list will be empty).
     """
 
-    warning_messages = []
-
     # Don't confuse type_, i.e. the type the value must have,
     # with type(value), i.e. the actual type of the value.
+    if type(value) is not type_:
+        return False, [_TYPE_WARNINGS[type_]]
+    if ((lower_bound is None or lower_bound <= value)
+            and (upper_bound is None or upper_bound >= value)):
+        return True, []
     if type_ is int:
-        if type(value) is not int:
-            warning_messages.append(WARNING(WarningMessage.INT))
-        elif not _validate_bounds(value, lower_bound, upper_bound):
-            warning_messages.append(WARNING(WarningMessage.LOWER_BOUNDED,
-                                            lower_bound=lower_bound))
-    elif type_ is float:
-        if type(value) is not float:
-            warning_messages.append(WARNING(WarningMessage.FLOAT))
-        elif not _validate_bounds(value, lower_bound, upper_bound):
-            warning_messages.append(WARNING(WarningMessage.BOUNDED,
-                                    lower_bound=lower_bound,
-                                    upper_bound=upper_bound))
-    elif type_ is bool and type(value) is not bool:
-        warning_messages.append(WARNING(WarningMessage.BOOL))
-
-    return len(warning_messages) == 0, warning_messages
-
-
-def _validate_bounds(
-    value: Union[int, float],
-    lower_bound: Union[int, float] = None,
-    upper_bound: Union[int, float] = None,
-) -> bool:
-    """Check whether a number is contained within the defined bounds.
-    Args:
-        value (:obj:`int` or :obj:`float`):
-            The value to check.
-        lower_bound (:obj:`float`, `optional`, defaults to :obj:`None`):
-            The lower bound of the constraint. Values smaller than this number are
-            invalid. If set to :obj:`None`, the bound is not checked (i.e., the value
-            is unbounded).
-        upper_bound (:obj:`float`, `optional`, defaults to :obj:`None`):
-            The upper bound of the constraint. Values greater than this number are
-            invalid. If set to :obj:`None`, the bound is not checked (i.e., the value
-            is unbounded).
-    Returns:
-        :obj:`bool`: :obj:`True` if :obj:`value` is contained within the bounds
-        :obj:`False` otherwise.
-    """
+        return False, [WARNING(OUT_OF_LOWER_BOUND,
+                               lower_bound=lower_bound)]
+    return False, [WARNING(OUT_OF_BOUNDS,
+                           lower_bound=lower_bound,
+                           upper_bound=upper_bound)]
+
 
-    return ((lower_bound is None or lower_bound <= value)
-             and (upper_bound is None or upper_bound >= value))
+# Warning for the values that are not of the type of their param
+_TYPE_WARNINGS = {int: INVALID_INT,
+                  float: INVALID_FLOAT,
+                  bool: INVALID_BOOL}
@@ -17,47 +17,46 @@
 
 """Warning messages."""
 
-__version__ = '0.1.0'
+__version__ = '0.2.0'
 
-import re
-from enum import Enum
+from functools import lru_cache
 from default_params import DefaultParam
 from typing import Union
 
-
-class WarningMessage(Enum):
-    """Warning messages for incorrect parameters."""
-
-    # int value
-    INT = "The specified value must be an int. Using default value instead."
-    # float value
-    FLOAT = "The specified value must be a float. Using default value instead."
-    # numeric vaule with a lower bound (inclusive)
-    LOWER_BOUNDED = ("The specified value must be greater or equal to "
-                     "{lower_bound}. Using default value instead.")
-    # numeric vaule with lower and upper bounds (inclusive)
-    BOUNDED = ("The specified value must be in the range [{lower_bound}, "
-               "{upper_bound}]. Using default values instead.")
-    # bool value
-    BOOL = "The specified value must be a bool. Using default value instead."
-    # unsupported parameter
-    UNSUPPORTED = "Parameter not supported. It will be ignored."
-    # relative_max_length
-    MAX_LENGTH = ("This parameter must be greater than 'relative_min_length'. Using "
-                  "default value instead.")
-    # relative_min_length
-    MIN_LENGTH = ("This parameter must be smaller than 'relative_max_length'. Using "
-                  "default value instead.")
-    # default relative_max_length
-    MAX_LENGTH_DEFAULT = (f"This parameter must be greater than the default "
-                          f"'relative_min_length' "
-                          f"({DefaultParam.RELATIVE_MIN_LENGTH.value}). Using "
-                          f"default value instead.")
-    # default relative_min_length
-    MIN_LENGTH_DEFAULT = (f"This parameter must be smaller than the default "
-                          f"'relative_max_length' "
-                          f"({DefaultParam.RELATIVE_MAX_LENGTH.value}). Using "
-                          f"default value instead.")
+# Warning messages for incorrect parameters. Plain constants, since they
+# are only read. The ones with placeholders are rendered with
+# ValidationWarning.
+
+# int value
+INVALID_INT = "The specified value must be an int. Using default value instead."
+# float value
+INVALID_FLOAT = "The specified value must be a float. Using default value instead."
+# numeric vaule with a lower bound (inclusive)
+OUT_OF_LOWER_BOUND = ("The specified value must be greater or equal to "
+                      "{lower_bound}. Using default value instead.")
+# numeric vaule with lower and upper bounds (inclusive)
+OUT_OF_BOUNDS = ("The specified value must be in the range [{lower_bound}, "
+                 "{upper_bound}]. Using default values instead.")
+# bool value
+INVALID_BOOL = "The specified value must be a bool. Using default value instead."
+# unsupported parameter
+UNSUPPORTED_PARAM = "Parameter not supported. It will be ignored."
+# relative_max_length
+INVALID_MAX_LENGTH = ("This parameter must be greater than 'relative_min_length'. "
+                      "Using default value instead.")
+# relative_min_length
+INVALID_MIN_LENGTH = ("This parameter must be smaller than 'relative_max_length'. "
+                      "Using default value instead.")
+# default relative_max_length
+INVALID_MAX_LENGTH_DEFAULT = (f"This parameter must be greater than the default "
+                              f"'relative_min_length' "
+                              f"({DefaultParam.RELATIVE_MIN_LENGTH.value}). Using "
+                              f"default value instead.")
+# default relative_min_length
+INVALID_MIN_LENGTH_DEFAULT = (f"This parameter must be smaller than the default "
+                              f"'relative_max_length' "
+                              f"({DefaultParam.RELATIVE_MAX_LENGTH.value}). Using "
+                              f"default value instead.")
 
 
 class ValidationWarning:
@@ -65,7 +64,7 @@ class ValidationWarning:
 
     def __call__(
         self,
-        warning_message: WarningMessage,
+        warning_message: str,
         **kwargs
     ) -> str:
         """Get a validation warning message.
@@ -76,14 +75,14 @@ class ValidationWarning:
 
             validation_warning = ValidationWarning()
             warning_str = validation_warning(
-                WarningMessage.LOWER_BOUNDED,
+                OUT_OF_LOWER_BOUND,
                 lower_bound=0
             )
             # "The specified value must be greater or equal to 0. "
             # "Using default value instead."
 
         Args:
-            warning_message(:obj:`WarningMessage`):
+            warning_message(:obj:`str`):
                 The warning message to get.
             **kwargs:
                 Additional info, the bounds of the parameter in case of it being a
@@ -93,35 +92,32 @@ class ValidationWarning:
             :obj:`str`: The warning message.
         """
 
-        return self._build_message(warning_message, **kwargs)
-
-    @classmethod
-    def _build_message(
-        cls,
-        warning_message: WarningMessage,
-        lower_bound: Union[int, float] = None,
-        upper_bound: Union[int, float] = None,
-    ) -> str:
-        """Build the warning message.
-
-        Args:
-            warning_message (:obj:`WarningMessage`):
-                The warning message to build.
-            lower_bound (:obj:`int` or :obj:`float`, `optional`, defaults to :obj:`None`):
-                The lower bound of the parameter.
-            upper_bound (:obj:`int` or :obj:`float`, `optional`, defaults to :obj:`None`):
-                The upper bound of the parameter.
-
-        Returns:
-            :obj:`str`: The warning message.
-        """
-
-        message = warning_message.value
-
-        if lower_bound is not None:
-            message = re.sub(r'{lower_bound}', str(lower_bound), message)
-
-        if lower_bound is not None:
-            message = re.sub(r'{upper_bound}', str(upper_bound), message)
-
-        return message
+        return _render(warning_message, **kwargs)
+
+
+# The messages only depend on their arguments, which take a handful of
+# different values, so they are rendered only once
+@lru_cache(maxsize=256)
+def _render(
+    warning_message: str,
+    lower_bound: Union[int, float] = None,
+    upper_bound: Union[int, float] = None,
+) -> str:
+    """Build the warning message.
+
+    Args:
+        warning_message (:obj:`str`):
+            The warning message to build.
+        lower_bound (:obj:`int` or :obj:`float`, `optional`, defaults to :obj:`None`):
+            The lower bound of the parameter.
+        upper_bound (:obj:`int` or :obj:`float`, `optional`, defaults to :obj:`None`):
+            The upper bound of the parameter.
+
+    Returns:
+        :obj:`str`: The warning message.
+    """
+
+    # The templates only reference the placeholders they need; str.format
+    # ignores the rest
+    return warning_message.format(lower_bound=lower_bound,
+                                  upper_bound=upper_bound)
@@ -17,7 +17,7 @@
 
 """Kafka Producer."""
 
-__version__ = '0.1.0'
+__version__ = '0.1.1'
 
 import socket
 from confluent_kafka import SerializingProducer
@@ -40,6 +40,7 @@ class Producer:
         # Producer configuration. Must match Stimzi/Kafka configuration.
         config = {'bootstrap.servers': "jizt-cluster-kafka-bootstrap:9092",
                   'client.id': socket.gethostname(),
-                  'key.serializer': StringSerializer('utf_8'),
-                  'value.serializer': StringSerializer('utf_8')}
+                  'key.serializer': StringSerializer('utf_8')}
+        # No value serializer is set, since the values are already serialized
+        # to bytes by orjson (see OrjsonSchema)
         return SerializingProducer(config)
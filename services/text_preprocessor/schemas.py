@@ -17,12 +17,24 @@
 
 """Marshmallow Schemas for TextPreprocessorService."""
 
+import orjson
 from marshmallow import Schema, fields
 
-__version__ = '0.1.5'
+__version__ = '0.1.7'
 
 
-class TextPreprocessingConsumedMsgSchema(Schema):
+class OrjsonSchema(Schema):
+    """Base schema that (de)serializes with :mod:`orjson` instead of :mod:`json`.
+
+    orjson is much faster. Its ``dumps()`` returns :obj:`bytes`, which the
+    producer sends as they are.
+    """
+
+    class Meta:
+        render_module = orjson
+
+
+class TextPreprocessingConsumedMsgSchema(OrjsonSchema):
     """Schema for the consumed messages from the topic :attr:`KafkaTopic.TEXT_PREPROCESSING`.
 
     Fields:
@@ -34,15 +46,18 @@ class TextPreprocessingConsumedMsgSchema(Schema):
             The params used in the summary generation.
         language (:obj:`str`):
             The language of the text.
+        stream_status (:obj:`bool`):
+            Whether every stage of the summary generation must be notified.
     """
 
     source = fields.Str(required=True)
     model = fields.Str(required=True)
     params = fields.Dict(required=True)
     language = fields.Str(required=True)
+    stream_status = fields.Bool()
 
 
-class DispatcherProducedMsgSchema(Schema):
+class DispatcherProducedMsgSchema(OrjsonSchema):
     """Schema for the produced messages to the topic :attr:`KafkaTopic.DISPATCHER`.
 
     Fields:
@@ -54,6 +69,8 @@ class DispatcherProducedMsgSchema(Schema):
             The model used to generate the summary.
         params (:obj:`dict`):
             The params used in the summary generation.
+        stream_status (:obj:`bool`):
+            Whether every stage of the summary generation must be notified.
         warnings (:obj:`dict`):
             The warnings derived from the client's request (if any).
     """
@@ -62,4 +79,5 @@ class DispatcherProducedMsgSchema(Schema):
     text_preprocessed = fields.Str(required=True)
     model = fields.Str(required=True)
     params = fields.Dict(required=True)
+    stream_status = fields.Bool()
     warnings = fields.Dict(keys=fields.Str(), values=fields.List(fields.Str()))
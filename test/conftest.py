@@ -3,10 +3,12 @@ from os.path import abspath, dirname, join
 
 paths = (
     abspath(join(dirname(dirname(__file__)), "services")),
+    abspath(join(dirname(dirname(__file__)),
+                 "services/dispatcher/data")),
     abspath(join(dirname(dirname(__file__)),
                  "services/text_preprocessor")),
     abspath(join(dirname(dirname(__file__)),
-                 "services/t5_large_encoder")),
+                 "services/t5_large_text_encoder")),
     abspath(join(dirname(dirname(__file__)),
                  "services/t5_large_summarizer")),
     abspath(join(dirname(dirname(__file__)),
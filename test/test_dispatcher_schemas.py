@@ -0,0 +1,66 @@
+# Copyright (C) 2020-2021 Diego Miguel Lozano <contact@jizt.it>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+#
+# For license information on the libraries used, see LICENSE.
+
+"""Dispatcher schemas tests."""
+
+import pytest
+from datetime import datetime, timezone
+from dispatcher.data import schemas
+from summary_status import SummaryStatus
+from supported_models import SupportedModel
+from supported_languages import SupportedLanguage
+
+
+summaries = [
+    schemas.Summary(id_="a3f2b1",
+                    source="This is the text to summarize.",
+                    output=None,
+                    model=SupportedModel.T5_LARGE,
+                    params={},
+                    status=SummaryStatus.ENCODING,
+                    started_at=datetime(2021, 1, 29, 18, 40, 12, 123456),
+                    ended_at=None,
+                    language=SupportedLanguage.ENGLISH),
+    schemas.Summary(id_="c5e8d7",
+                    source="This is the text to summarize.",
+                    output="This is the summary.",
+                    model=SupportedModel.T5_LARGE,
+                    params={"num_beams": 4, "length_penalty": 1.2},
+                    status=SummaryStatus.COMPLETED,
+                    started_at=datetime(2021, 1, 29, 18, 40, 12,
+                                        tzinfo=timezone.utc),
+                    ended_at=datetime(2021, 1, 29, 18, 41, 3,
+                                      tzinfo=timezone.utc),
+                    language=SupportedLanguage.ENGLISH)
+]
+
+warnings = [
+    None,
+    {"model": ["Unsupported model. Using default model."],
+     "params": ["num_beans: unsupported param."]}
+]
+
+
+@pytest.mark.parametrize("summary", summaries)
+@pytest.mark.parametrize("warnings", warnings)
+def test_dump_response(summary, warnings):
+    expected = schemas.ResponseSchema().dump(summary)
+    if warnings is not None:
+        expected["warnings"] = warnings
+    response = schemas.dump_response(summary, warnings)
+    assert response == expected
+    assert list(response) == list(expected)
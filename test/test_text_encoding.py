@@ -20,6 +20,8 @@
 import pytest
 from text_preprocessor import text_preprocessing as tp
 from t5_large_text_encoder import text_encoding as te
+from t5_large_text_encoder import schemas as te_schemas
+from t5_large_text_summarizer import schemas as ts_schemas
 import torch
 import copy
 from typing import List, Optional, Union
@@ -245,6 +247,38 @@ def _encode(tokenizer, splitter):
         splitter.encode('', return_tensors='xd')
 
 
+def test_encode_batch(initialize_t5):
+    t5_tokenizer, t5_splitter = initialize_t5
+    texts = [" ".join(sentences), " ".join(sentences*10)]
+    encoded_texts = t5_splitter.encode_batch(texts)
+    assert len(encoded_texts) == len(texts)
+    for text, encoded in zip(texts, encoded_texts):
+        # The same as encoding the text alone, and as encoding it with the
+        # slow tokenizer one sentence at a time
+        for expected in (t5_splitter.encode(text),
+                         _encode_slow(t5_tokenizer, t5_splitter, text)):
+            assert len(encoded) == len(expected)
+            for subdiv, expected_subdiv in zip(encoded, expected):
+                assert torch.equal(subdiv, expected_subdiv)
+
+
+def _encode_slow(tokenizer, splitter, text, prefix='summarize: '):
+    # Each sentence is encoded on its own, removing its EOS token
+    sent_tks = [tokenizer.encode(sent, return_tensors='pt')[0][:-1]
+                for sent in te.sentence_tokenize(text)]
+    sent2ntks = [len(sent) for sent in sent_tks]
+    prefix_tks = tokenizer.encode(prefix, return_tensors='pt')[0][:-1]
+    split_points, subdiv2ntks = splitter._divide_eagerly(sent2ntks,
+                                                         len(prefix_tks))
+    split_points, _ = splitter._balance_subdivisions(split_points,
+                                                     subdiv2ntks,
+                                                     sent2ntks)
+    return [torch.cat([prefix_tks]
+                      + sent_tks[split_points[i]:split_points[i+1]]
+                      + [torch.tensor([tokenizer.eos_token_id])]).unsqueeze(0)
+            for i in range(len(split_points) - 1)]
+
+
 def test_init(initialize_bart, initialize_t5):
     bart_tokenizer, _ = initialize_bart
     t5_tokenizer, _ = initialize_t5
@@ -258,3 +292,19 @@ def test_init(initialize_bart, initialize_t5):
 def _init(tokenizer, model_name):
     splitter = te.SplitterEncoder(model_name)
     assert type(splitter.tokenizer) is type(tokenizer)
+
+
+def test_text_encodings_msg():
+    # Subdivisions of different lengths, with ids that do not fit in 16 bits
+    text_encodings = [torch.tensor([[0, 1, 2**15, 32099]]),
+                      torch.tensor([[2**15 + 1]]),
+                      torch.arange(2**16, 2**16 + 600).unsqueeze(0)]
+    for params in ({}, {"num_beams": 4, "relative_max_length": 0.4}):
+        data = {"text_encodings": text_encodings, "params": params}
+        # Produced by the encoder, consumed by the summarizer
+        value = te_schemas.TextEncodingsMsg().dumps(data)
+        loaded = ts_schemas.TextEncodingsMsg().loads(value)
+        assert loaded["params"] == params
+        assert len(loaded["text_encodings"]) == len(text_encodings)
+        for subdiv, expected in zip(loaded["text_encodings"], text_encodings):
+            assert torch.equal(subdiv, expected)